@@ -0,0 +1,111 @@
+"""Just enough of bpy, bpy_extras and mathutils to import the add-on in a
+plain Python interpreter and run its network, cache and task code.
+
+Anything that would need Blender itself (operators, import/export, drawing)
+is a no-op, benchmark those with `blender -b` instead.
+"""
+
+import os
+import sys
+import tempfile
+import types
+
+
+# Accepts any attribute access, call or item access and returns itself
+class Anything:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __getattr__(self, name):
+        return Anything()
+
+    def __call__(self, *args, **kwargs):
+        return Anything()
+
+    def __getitem__(self, key):
+        return Anything()
+
+    def __iter__(self):
+        return iter(())
+
+    def __bool__(self):
+        return False
+
+
+class _Previews(dict):
+    def load(self, name, path, kind):
+        self[name] = Anything()
+        return self[name]
+
+    def close(self):
+        self.clear()
+
+
+class _TypesModule(types.ModuleType):
+    def __getattr__(self, name):
+        cls = type(name, (), {})
+        setattr(self, name, cls)
+        return cls
+
+
+class _PermissiveModule(types.ModuleType):
+    def __getattr__(self, name):
+        return Anything()
+
+
+def install(resource_dir=None):
+    if "bpy" in sys.modules:
+        return sys.modules["bpy"]
+    resource_dir = resource_dir or tempfile.mkdtemp(prefix="meshy_bench_")
+
+    def user_resource(kind, path="", create=False):
+        directory = os.path.join(resource_dir, path)
+        if create:
+            os.makedirs(directory, exist_ok=True)
+        return directory
+
+    bpy = _PermissiveModule("bpy")
+    bpy.types = _TypesModule("bpy.types")
+    bpy.props = _PermissiveModule("bpy.props")
+    bpy.utils = _PermissiveModule("bpy.utils")
+    bpy.utils.previews = types.ModuleType("bpy.utils.previews")
+    bpy.utils.previews.new = _Previews
+    bpy.utils.previews.remove = lambda collection: collection.close()
+    bpy.utils.user_resource = user_resource
+    bpy.app = _PermissiveModule("bpy.app")
+    bpy.app.timers = types.ModuleType("bpy.app.timers")
+    bpy.app.timers.register = lambda func, first_interval=0, persistent=False: None
+    bpy.app.timers.is_registered = lambda func: False
+    bpy.app.timers.unregister = lambda func: None
+    bpy.app.handlers = types.ModuleType("bpy.app.handlers")
+    bpy.app.handlers.persistent = lambda func: func
+    for name in ("load_post", "undo_post", "redo_post"):
+        setattr(bpy.app.handlers, name, [])
+    bpy.app.background = True
+    bpy.context = Anything()
+    bpy.stub = True
+
+    bpy_extras = types.ModuleType("bpy_extras")
+    bpy_extras.io_utils = types.ModuleType("bpy_extras.io_utils")
+    bpy_extras.io_utils.ExportHelper = type("ExportHelper", (), {})
+    bpy_extras.io_utils.ImportHelper = type("ImportHelper", (), {})
+
+    mathutils = _PermissiveModule("mathutils")
+    mathutils.Matrix = Anything
+    mathutils.Vector = Anything
+
+    for module in (
+        bpy,
+        bpy.types,
+        bpy.props,
+        bpy.utils,
+        bpy.utils.previews,
+        bpy.app,
+        bpy.app.timers,
+        bpy.app.handlers,
+        bpy_extras,
+        bpy_extras.io_utils,
+        mathutils,
+    ):
+        sys.modules[module.__name__] = module
+    return bpy
@@ -0,0 +1,364 @@
+"""Local stand-in for the Meshy endpoints the add-on talks to.
+
+Serves /public/showcases, /v2/text-to-3d, /v1/text-to-texture, thumbnails and
+GLB files from generated data, with configurable latency, bandwidth and error
+injection. Run it on its own to point a real Blender session at it:
+
+    python mock_server.py --port 8800 --latency 0.05
+    MESHY_API_BASE=http://127.0.0.1:8800 blender
+"""
+
+import argparse
+import json
+import random
+import struct
+import threading
+import time
+import uuid
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+THROTTLE_CHUNK = 16 * 1024
+ART_STYLES = ("realistic", "cartoon", "low-poly")
+
+
+class MockConfig:
+    def __init__(
+        self,
+        latency=0.0,
+        bandwidth=0,
+        error_rate=0.0,
+        showcases=240,
+        tasks=300,
+        model_size=2 * 1024 * 1024,
+        thumbnail_size=256,
+        task_seconds=1.0,
+        seed=0,
+    ):
+        # Seconds added before every response
+        self.latency = latency
+        # Bytes per second for response bodies, 0 is unthrottled
+        self.bandwidth = bandwidth
+        # Fraction of requests answered with 503
+        self.error_rate = error_rate
+        self.showcases = showcases
+        self.tasks = tasks
+        self.model_size = model_size
+        self.thumbnail_size = thumbnail_size
+        # Seconds until a submitted task succeeds
+        self.task_seconds = task_seconds
+        self.seed = seed
+
+
+# Solid color RGB PNG
+def make_png(size, color=(120, 160, 200)):
+    def chunk(kind, data):
+        body = kind + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body))
+
+    row = b"\x00" + bytes(color) * size
+    header = struct.pack(">IIBBBBB", size, size, 8, 2, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", zlib.compress(row * size))
+        + chunk(b"IEND", b"")
+    )
+
+
+# Binary glTF with a single triangle, padded with an unused buffer tail up to
+# size bytes so download and hashing cost match a real model
+def make_glb(size):
+    positions = struct.pack("<9f", 0, 0, 0, 1, 0, 0, 0, 1, 0)
+    document = {
+        "asset": {"version": "2.0", "generator": "meshy mock server"},
+        "scene": 0,
+        "scenes": [{"nodes": [0]}],
+        "nodes": [{"mesh": 0, "name": "MockModel"}],
+        "meshes": [{"primitives": [{"attributes": {"POSITION": 0}}]}],
+        "accessors": [
+            {
+                "bufferView": 0,
+                "componentType": 5126,
+                "count": 3,
+                "type": "VEC3",
+                "min": [0, 0, 0],
+                "max": [1, 1, 0],
+            }
+        ],
+        "bufferViews": [{"buffer": 0, "byteOffset": 0, "byteLength": len(positions)}],
+        "buffers": [{"byteLength": 0}],
+    }
+    binary_length = max(len(positions), size - 200)
+    binary_length += -binary_length % 4
+    document["buffers"][0]["byteLength"] = binary_length
+    json_chunk = json.dumps(document).encode("utf-8")
+    json_chunk += b" " * (-len(json_chunk) % 4)
+    binary = positions + b"\x00" * (binary_length - len(positions))
+    total = 12 + 8 + len(json_chunk) + 8 + len(binary)
+    return (
+        struct.pack("<III", 0x46546C67, 2, total)
+        + struct.pack("<II", len(json_chunk), 0x4E4F534A)
+        + json_chunk
+        + struct.pack("<II", len(binary), 0x004E4942)
+        + binary
+    )
+
+
+class MockMeshy:
+    def __init__(self, config):
+        self.config = config
+        self.base_url = ""
+        self.thumbnail = make_png(config.thumbnail_size)
+        self.model = make_glb(config.model_size)
+        self.requests = 0
+        self.errors = 0
+        self._random = random.Random(config.seed)
+        self._lock = threading.Lock()
+        now = int(time.time() * 1000)
+        self.showcases = [
+            {
+                "id": f"showcase-{i:05d}",
+                "name": f"Mock model {i} {ART_STYLES[i % 3]}",
+                "author": "mock",
+                "created_at": now - i * 60000,
+                "popularity": (i * 7919) % 1000,
+                "downloads": (i * 104729) % 5000,
+            }
+            for i in range(config.showcases)
+        ]
+        self.tasks = {
+            "t2m": [
+                self._task(f"t2m-{i:05d}", now - i * 60000, i)
+                for i in range(config.tasks)
+            ],
+            "t2t": [
+                self._task(f"t2t-{i:05d}", now - i * 60000, i)
+                for i in range(config.tasks)
+            ],
+        }
+
+    def _task(self, task_id, created_at, i=0):
+        status = "IN_PROGRESS" if i % 25 == 0 else "SUCCEEDED"
+        return {
+            "id": task_id,
+            "name": f"Task {task_id}",
+            "art_style": ART_STYLES[i % 3],
+            "mode": "preview",
+            "status": status,
+            "progress": 50 if status == "IN_PROGRESS" else 100,
+            "created_at": created_at,
+            "model_urls": {"glb": f"{self.base_url}/models/{task_id}.glb"},
+            "thumbnail_url": f"{self.base_url}/thumbnails/{task_id}.png",
+        }
+
+    # Submitted tasks run for config.task_seconds, then succeed
+    def advance(self, task):
+        if task["status"] in ("PENDING", "IN_PROGRESS") and "submitted" in task:
+            elapsed = time.time() - task["submitted"]
+            if elapsed >= self.config.task_seconds:
+                task["status"] = "SUCCEEDED"
+                task["progress"] = 100
+            else:
+                task["status"] = "IN_PROGRESS"
+                task["progress"] = int(100 * elapsed / self.config.task_seconds)
+        return task
+
+    def should_fail(self):
+        with self._lock:
+            self.requests += 1
+            if (
+                self.config.error_rate
+                and self._random.random() < self.config.error_rate
+            ):
+                self.errors += 1
+                return True
+        return False
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    mock = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body=b"", content_type="application/json", headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command == "HEAD":
+            return
+        bandwidth = self.mock.config.bandwidth
+        if not bandwidth:
+            self.wfile.write(body)
+            return
+        for start in range(0, len(body), THROTTLE_CHUNK):
+            chunk = body[start : start + THROTTLE_CHUNK]
+            self.wfile.write(chunk)
+            time.sleep(len(chunk) / bandwidth)
+
+    def _json(self, data, status=200):
+        self._send(status, json.dumps(data).encode("utf-8"))
+
+    def _begin(self):
+        if self.mock.config.latency:
+            time.sleep(self.mock.config.latency)
+        if self.mock.should_fail():
+            self._json({"message": "injected error"}, 503)
+            return False
+        return True
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        remaining = length
+        while remaining > 0:
+            remaining -= len(self.rfile.read(min(remaining, 1024 * 1024)))
+        return length
+
+    def do_GET(self):
+        if not self._begin():
+            return
+        url = urlsplit(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        parts = [p for p in url.path.split("/") if p]
+
+        if url.path == "/public/showcases":
+            return self._showcases(query)
+        if len(parts) == 2 and parts[0] == "thumbnails":
+            return self._asset(self.mock.thumbnail, "image/png")
+        if len(parts) == 2 and parts[0] == "models":
+            return self._asset(self.mock.model, "model/gltf-binary")
+        if parts[:2] in (["v2", "text-to-3d"], ["v1", "text-to-texture"]):
+            tasks = self.mock.tasks["t2m" if parts[0] == "v2" else "t2t"]
+            if len(parts) == 3:
+                for task in tasks:
+                    if task["id"] == parts[2]:
+                        return self._json(self.mock.advance(task))
+                return self._json({"message": "not found"}, 404)
+            page_num = int(query.get("pageNum", 1))
+            page_size = int(query.get("pageSize", 10))
+            start = (page_num - 1) * page_size
+            return self._json(tasks[start : start + page_size])
+        self._json({"message": "not found"}, 404)
+
+    do_HEAD = do_GET
+
+    def do_POST(self):
+        self._read_body()
+        if not self._begin():
+            return
+        parts = [p for p in urlsplit(self.path).path.split("/") if p]
+        if parts[:2] in (["v2", "text-to-3d"], ["v1", "text-to-texture"]):
+            kind = "t2m" if parts[0] == "v2" else "t2t"
+            task = self.mock._task(uuid.uuid4().hex, int(time.time() * 1000))
+            task["status"] = "PENDING"
+            task["submitted"] = time.time()
+            with self.mock._lock:
+                self.mock.tasks[kind].insert(0, task)
+            return self._json({"result": task["id"]})
+        self._json({"message": "not found"}, 404)
+
+    def do_DELETE(self):
+        if not self._begin():
+            return
+        self._json({})
+
+    def _showcases(self, query):
+        search = query.get("search", "").lower()
+        matches = [s for s in self.mock.showcases if search in s["name"].lower()]
+        sort_by = query.get("sortBy", "-created_at").lstrip("-")
+        sort_key = {"public_popularity": "popularity"}.get(sort_by, sort_by)
+        if sort_key in ("created_at", "popularity", "downloads"):
+            matches.sort(key=lambda s: s[sort_key], reverse=True)
+        page_num = int(query.get("pageNum", 1))
+        page_size = int(query.get("pageSize", 24))
+        start = (page_num - 1) * page_size
+        base = self.mock.base_url
+        result = [
+            {
+                "id": s["id"],
+                "name": s["name"],
+                "author": s["author"],
+                "thumbnailUrl": f"{base}/thumbnails/{s['id']}.png",
+                "modelUrl": f"{base}/models/{s['id']}.glb",
+                "createdAt": s["created_at"],
+                "publicPopularity": s["popularity"],
+                "downloads": s["downloads"],
+            }
+            for s in matches[start : start + page_size]
+        ]
+        self._json({"result": result})
+
+    def _asset(self, body, content_type):
+        etag = f'"{zlib.crc32(body):08x}"'
+        if self.headers.get("If-None-Match") == etag:
+            return self._send(304, headers={"ETag": etag})
+        self._send(200, body, content_type, {"ETag": etag})
+
+
+# Start the server on a background thread, returns (server, mock state)
+def start(config, host="127.0.0.1", port=0):
+    mock = MockMeshy(config)
+    handler = type("BoundMockHandler", (MockHandler,), {"mock": mock})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    mock.base_url = f"http://{host}:{server.server_address[1]}"
+    for tasks in mock.tasks.values():
+        for task in tasks:
+            task["model_urls"]["glb"] = f"{mock.base_url}/models/{task['id']}.glb"
+            task["thumbnail_url"] = f"{mock.base_url}/thumbnails/{task['id']}.png"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, mock
+
+
+def add_arguments(parser):
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="seconds per request"
+    )
+    parser.add_argument(
+        "--bandwidth", type=float, default=0, help="bytes per second, 0 unthrottled"
+    )
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="fraction of 503 responses"
+    )
+    parser.add_argument("--showcases", type=int, default=240)
+    parser.add_argument("--tasks", type=int, default=300)
+    parser.add_argument(
+        "--model-size", type=int, default=2 * 1024 * 1024, help="GLB size in bytes"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def config_from_args(args):
+    return MockConfig(
+        latency=args.latency,
+        bandwidth=args.bandwidth,
+        error_rate=args.error_rate,
+        showcases=args.showcases,
+        tasks=args.tasks,
+        model_size=args.model_size,
+        seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_arguments(parser)
+    parser.add_argument("--port", type=int, default=8800)
+    args = parser.parse_args()
+    server, mock = start(config_from_args(args), port=args.port)
+    print(f"Mock Meshy API on {mock.base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
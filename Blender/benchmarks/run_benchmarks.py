@@ -0,0 +1,355 @@
+"""Benchmark the add-on against the local mock Meshy API.
+
+Plain Python runs everything that does not need Blender, using bpy_stub:
+
+    python run_benchmarks.py --latency 0.05 --output report.json
+
+Inside Blender, glTF import is measured as well:
+
+    blender -b --factory-startup --python run_benchmarks.py -- --output report.json
+
+Pass --baseline with an earlier report to fail (exit code 1) when a
+benchmark's median got slower than --tolerance allows.
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ADDON_DIR = os.path.join(os.path.dirname(HERE), "meshy-for-blender")
+sys.path.insert(0, HERE)
+
+import mock_server  # noqa: E402
+
+BENCHMARKS = {}
+
+
+def benchmark(name, needs_blender=False):
+    def decorator(func):
+        BENCHMARKS[name] = (func, needs_blender)
+        return func
+
+    return decorator
+
+
+class Bench:
+    def __init__(self, panels, mock, iterations, workdir):
+        self.panels = panels
+        self.mock = mock
+        self.iterations = iterations
+        self.workdir = workdir
+
+    # Fresh, empty caches so every iteration measures the network path
+    def cold_caches(self):
+        Cache = self.panels.Cache
+        directory = tempfile.mkdtemp(dir=self.workdir)
+        with Cache._caches_lock:
+            Cache._caches["meshy_thumbnails"] = Cache.ThumbnailCache(
+                os.path.join(directory, "thumbnails")
+            )
+            Cache._caches["meshy_models"] = Cache.ModelCache(
+                os.path.join(directory, "models")
+            )
+            Cache._caches["meshy_catalog"] = Cache.ShowcaseCatalog(
+                os.path.join(directory, "catalog")
+            )
+        self.panels.AssetBrowser.page_cache.clear()
+
+    def time(self, func):
+        start = time.perf_counter()
+        func()
+        return time.perf_counter() - start
+
+
+@benchmark("search")
+def bench_search(bench):
+    MeshyApi = bench.panels.AssetBrowser.MeshyApi
+    samples = []
+    for i in range(bench.iterations):
+        bench.cold_caches()
+        api = MeshyApi()
+        samples.append(
+            bench.time(lambda: api.fetch_model_data(1, search_query=f"model {i}"))
+        )
+    return samples, {"results": len(api.models)}
+
+
+@benchmark("paging")
+def bench_paging(bench):
+    MeshyApi = bench.panels.AssetBrowser.MeshyApi
+    bench.cold_caches()
+    cold, warm = [], []
+    for page in range(1, bench.iterations + 1):
+        api = MeshyApi()
+        cold.append(bench.time(lambda: api.fetch_model_data(page)))
+    for page in range(1, bench.iterations + 1):
+        api = MeshyApi()
+        warm.append(bench.time(lambda: api.fetch_model_data(page)))
+    return cold, {"cached_median_ms": statistics.median(warm) * 1000}
+
+
+# Local catalog searches after paging through every showcase once, against
+# the same searches sent to the server
+@benchmark("catalog_search")
+def bench_catalog_search(bench):
+    AssetBrowser = bench.panels.AssetBrowser
+    bench.cold_caches()
+    api = AssetBrowser.MeshyApi()
+    page = 1
+    while True:
+        api.fetch_model_data(page)
+        if not api.has_next_page:
+            break
+        page += 1
+    catalog = bench.panels.Cache.get_showcase_catalog()
+    sorts = ["-created_at", "-public_popularity", "-downloads"]
+    local, remote = [], []
+    for i in range(bench.iterations):
+        query = f"model {i}"
+        sort_by = sorts[i % len(sorts)]
+        local.append(
+            bench.time(lambda: api.fetch_model_data(1, query, sort_by, offline=True))
+        )
+        AssetBrowser.page_cache.clear()
+        remote.append(bench.time(lambda: api.fetch_model_data(1, query, sort_by)))
+    return local, {
+        "showcases": len(catalog),
+        "network_median_ms": statistics.median(remote) * 1000,
+    }
+
+
+# Time until all thumbnails of one result page are on disk, through the same
+# worker pool the Asset Browser grid uses
+@benchmark("thumbnail_grid")
+def bench_thumbnail_grid(bench):
+    AssetBrowser = bench.panels.AssetBrowser
+    executor = bench.panels.ThumbnailLoader.ThumbnailExecutor()
+    samples = []
+    try:
+        for _ in range(bench.iterations):
+            bench.cold_caches()
+            api = AssetBrowser.MeshyApi()
+            api.fetch_model_data(1)
+            models = list(api.models.values())
+            done = threading.Semaphore(0)
+
+            def download(model):
+                try:
+                    api.download_thumbnail(model)
+                finally:
+                    done.release()
+
+            def fill():
+                generation = executor.new_generation()
+                for model in models:
+                    executor.submit(generation, lambda model=model: download(model))
+                for _ in models:
+                    done.acquire()
+
+            samples.append(bench.time(fill))
+    finally:
+        executor.shutdown()
+    return samples, {"thumbnails": len(models)}
+
+
+@benchmark("model_download")
+def bench_model_download(bench):
+    Cache = bench.panels.Cache
+    url = f"{bench.mock.base_url}/models/bench.glb"
+    samples = []
+    for _ in range(bench.iterations):
+        bench.cold_caches()
+        samples.append(bench.time(lambda: Cache.get_model_cache().fetch("bench", url)))
+    size = len(bench.mock.model)
+    warm = bench.time(lambda: Cache.get_model_cache().fetch("bench", url))
+    return samples, {
+        "bytes": size,
+        "mb_per_s": size / statistics.median(samples) / 1e6,
+        "cached_ms": warm * 1000,
+    }
+
+
+@benchmark("model_import", needs_blender=True)
+def bench_model_import(bench):
+    import bpy
+
+    Cache = bench.panels.Cache
+    bench.cold_caches()
+    path = Cache.get_model_cache().fetch(
+        "bench", f"{bench.mock.base_url}/models/bench.glb"
+    )
+    samples = []
+    for _ in range(bench.iterations):
+        imported = []
+        samples.append(
+            bench.time(
+                lambda: imported.extend(
+                    bench.panels.ImportPipeline.import_glb(
+                        path, dedupe=True, max_texture_size=0
+                    )
+                )
+            )
+        )
+        bpy.data.batch_remove(imported)
+    return samples, {"bytes": os.path.getsize(path)}
+
+
+@benchmark("task_refresh")
+def bench_task_refresh(bench):
+    TaskStore = bench.panels.TaskStore
+    url = bench.panels.TextToModelPanel.T2M_URL
+    full, incremental = [], []
+    for _ in range(bench.iterations):
+        store = TaskStore.TaskStore()
+        sync = TaskStore.TaskSync(url, store)
+        full.append(bench.time(lambda: sync.sync({})))
+        incremental.append(bench.time(lambda: sync.sync({})))
+    return full, {
+        "tasks": len(store),
+        "incremental_median_ms": statistics.median(incremental) * 1000,
+    }
+
+
+@benchmark("texture_upload")
+def bench_texture_upload(bench):
+    Upload = bench.panels.Upload
+    url = bench.panels.TextToTexturePanel.T2T_URL
+    path = os.path.join(bench.workdir, "upload.glb")
+    with open(path, "wb") as f:
+        f.write(bench.mock.model)
+    samples = []
+    for _ in range(bench.iterations):
+        samples.append(
+            bench.time(
+                lambda: Upload.upload_file(
+                    url, {"name": "bench"}, "model_file", "bench.glb", path, {}
+                )
+            )
+        )
+    return samples, {"bytes": len(bench.mock.model)}
+
+
+def summarize(samples):
+    ms = sorted(s * 1000 for s in samples)
+    return {
+        "samples": len(ms),
+        "min_ms": ms[0],
+        "median_ms": statistics.median(ms),
+        "mean_ms": statistics.fmean(ms),
+        "p95_ms": ms[min(len(ms) - 1, int(round(0.95 * (len(ms) - 1))))],
+        "max_ms": ms[-1],
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=HERE,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+# Benchmarks whose median grew by more than tolerance over the baseline
+def regressions(report, baseline, tolerance):
+    found = []
+    for name, result in report["benchmarks"].items():
+        before = baseline.get("benchmarks", {}).get(name)
+        if not before or "median_ms" not in result or "median_ms" not in before:
+            continue
+        if result["median_ms"] > before["median_ms"] * (1 + tolerance):
+            found.append(
+                f"{name}: {before['median_ms']:.1f} ms -> {result['median_ms']:.1f} ms"
+            )
+    return found
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    mock_server.add_arguments(parser)
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--only", default="", help="comma separated benchmark names")
+    parser.add_argument("--output", default="benchmark_report.json")
+    parser.add_argument("--baseline", default="")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = parse_args(argv)
+    in_blender = importlib.util.find_spec("bpy") is not None
+    workdir = tempfile.mkdtemp(prefix="meshy_bench_")
+    if not in_blender:
+        import bpy_stub
+
+        bpy_stub.install(os.path.join(workdir, "resources"))
+
+    config = mock_server.config_from_args(args)
+    server, mock = mock_server.start(config)
+    # Read when the add-on modules are imported
+    os.environ["MESHY_API_BASE"] = mock.base_url
+    sys.path.insert(0, ADDON_DIR)
+    import MeshyPanels
+
+    MeshyPanels.Tracing.reset()
+    bench = Bench(MeshyPanels, mock, args.iterations, workdir)
+    wanted = [n for n in args.only.split(",") if n] or list(BENCHMARKS)
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "blender": in_blender,
+        "config": vars(config),
+        "benchmarks": {},
+    }
+    try:
+        for name in wanted:
+            func, needs_blender = BENCHMARKS[name]
+            if needs_blender and not in_blender:
+                report["benchmarks"][name] = {"skipped": "needs blender -b"}
+                continue
+            samples, extra = func(bench)
+            result = {**summarize(samples), **extra}
+            report["benchmarks"][name] = result
+            print(f"{name:16} median {result['median_ms']:9.2f} ms  {extra}")
+    finally:
+        server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report["requests"] = mock.requests
+    report["injected_errors"] = mock.errors
+    report["http_pool"] = MeshyPanels.HttpClient.pool_stats()
+    report["histograms"] = MeshyPanels.Tracing.histograms()
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            found = regressions(report, json.load(f), args.tolerance)
+        for line in found:
+            print(f"REGRESSION {line}")
+        if found:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    argv = sys.argv[sys.argv.index("--") + 1 :] if "--" in sys.argv else sys.argv[1:]
+    sys.exit(main(argv))
@@ -0,0 +1,100 @@
+"""Check that the Asset Browser replays catalog pages as the server sent them.
+
+Runs in plain Python against the mock Meshy API, using bpy_stub:
+
+    python -m unittest test_showcase_catalog
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ADDON_DIR = os.path.join(os.path.dirname(HERE), "meshy-for-blender")
+sys.path.insert(0, HERE)
+
+import bpy_stub  # noqa: E402
+import mock_server  # noqa: E402
+
+panels = None
+server = None
+mock = None
+workdir = None
+
+
+def setUpModule():
+    global panels, server, mock, workdir
+    workdir = tempfile.mkdtemp(prefix="meshy_test_")
+    bpy_stub.install(os.path.join(workdir, "resources"))
+    server, mock = mock_server.start(mock_server.MockConfig(latency=0))
+    # Read when the add-on modules are imported
+    os.environ["MESHY_API_BASE"] = mock.base_url
+    sys.path.insert(0, ADDON_DIR)
+    import MeshyPanels
+
+    panels = MeshyPanels
+
+
+def tearDownModule():
+    server.shutdown()
+    server.server_close()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+class CatalogReplayTest(unittest.TestCase):
+    def setUp(self):
+        panels.Cache.set_cache_root(tempfile.mkdtemp(dir=workdir))
+        panels.AssetBrowser.page_cache.clear()
+
+    # Fetch a page from the server, then again with only the catalog to
+    # answer it
+    def fetch_twice(self, search, sort_by="-created_at", page_num=1):
+        api = panels.AssetBrowser.MeshyApi()
+        api.fetch_model_data(page_num, search, sort_by)
+        served = (list(api.models), api.has_next_page)
+        panels.AssetBrowser.page_cache.clear()
+        requests = mock.requests
+        api = panels.AssetBrowser.MeshyApi()
+        api.fetch_model_data(page_num, search, sort_by)
+        self.assertEqual(mock.requests, requests)
+        return served, (list(api.models), api.has_next_page)
+
+    # The mock matches name substrings, which the catalog's own word-prefix
+    # search would not find
+    def test_fresh_page_is_the_server_page(self):
+        served, replayed = self.fetch_twice("odel")
+        self.assertEqual(len(served[0]), panels.AssetBrowser.PAGE_SIZE)
+        self.assertTrue(served[1])
+        self.assertEqual(replayed, served)
+
+    def test_fresh_page_keeps_the_server_order(self):
+        for sort_by in ("-created_at", "-public_popularity", "-downloads"):
+            served, replayed = self.fetch_twice("", sort_by, page_num=2)
+            self.assertEqual(replayed, served)
+
+    def test_empty_page_replays_without_a_next_page(self):
+        served, replayed = self.fetch_twice("no such showcase")
+        self.assertEqual(served, ([], False))
+        self.assertEqual(replayed, served)
+
+    def test_stale_page_is_not_replayed(self):
+        catalog = panels.Cache.get_showcase_catalog()
+        panels.AssetBrowser.MeshyApi().fetch_model_data(1, "odel")
+        self.assertIsNotNone(catalog.replay("odel", "-created_at", 1))
+        self.assertIsNone(catalog.replay("odel", "-created_at", 1, max_age=0))
+        self.assertIsNone(catalog.replay("odel", "-created_at", 2))
+
+    def test_offline_searches_the_catalog(self):
+        api = panels.AssetBrowser.MeshyApi()
+        api.fetch_model_data(1, "odel")
+        if panels.Cache.get_showcase_catalog().has_fts:
+            api.fetch_model_data(1, "odel", offline=True)
+            self.assertEqual(len(api.models), 0)
+        api.fetch_model_data(1, "mock model", offline=True)
+        self.assertEqual(len(api.models), panels.AssetBrowser.PAGE_SIZE)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,6 @@
 import bpy
-import requests
-import os
 import threading
-import shutil
+import time
 from bpy.props import (
     StringProperty,
     BoolProperty,
@@ -11,11 +9,23 @@ from bpy.props import (
     PointerProperty,
 )
 from bpy.types import Operator, Panel, PropertyGroup
-import bpy.utils.previews
 from collections import OrderedDict
-
-preview_collection = {"meshy": bpy.utils.previews.new()}
-ongoingSearches = set([])
+from . import HttpClient
+from . import Tracing
+from .Dispatch import dispatcher
+from .MeshyClient import SHOWCASE_URL
+from .Cache import get_showcase_catalog, get_thumbnail_cache, flush_caches
+from .ThumbnailLoader import thumbnail_executor, PRIORITY_BACKGROUND
+from .Download import draw_downloads
+from .ModalDownload import ModalDownloadOperator
+from .ImportPipeline import draw_import_options, import_glb
+from .PreviewStore import PreviewStore
+
+preview_store = PreviewStore()
+PAGE_CACHE_TTL = 300
+PAGE_SIZE = 24
+# Seconds of typing pause before a search is sent
+SEARCH_DEBOUNCE = 0.4
 
 
 class MeshyModel:
@@ -34,47 +44,201 @@ class MeshyApi:
         self.headers = {}
         self.page_num = 1
         self.has_next_page = False
-        self.thumbnail_dir = bpy.utils.user_resource(
-            "SCRIPTS", path="meshy_thumbnails", create=True
-        )
 
-    def fetch_model_data(self, page_num=1, search_query="", sort_by="-created_at"):
-        base_url = "https://api.meshy.ai/public/showcases"
+    # Pages fetched in the last hour are replayed from the local catalog.
+    # Offline, and when the server cannot be reached, the catalog is
+    # searched instead.
+    def fetch_model_data(
+        self, page_num=1, search_query="", sort_by="-created_at", offline=False
+    ):
+        base_url = SHOWCASE_URL
         params = {
             "pageNum": page_num,
-            "pageSize": 24,
+            "pageSize": PAGE_SIZE,
             "search": search_query,
             "sortBy": sort_by,
         }
 
-        response = requests.get(base_url, params=params)
-        if response.status_code == 200:
-            data = response.json()
-            self.models.clear()
-            for model_data in data["result"]:
-                model = MeshyModel(model_data)
-                self.models[model.id] = model
-            self.has_next_page = len(data["result"]) > 0
+        if offline:
+            self.search_catalog(page_num, search_query, sort_by)
+            return
+
+        key = (search_query, sort_by, page_num)
+        cached = page_cache.get(key)
+        if cached is not None:
+            Tracing.count("browser.page_cache_hits")
+            models, self.has_next_page = cached
+            self.models = OrderedDict((model.id, model) for model in models)
             self.page_num = page_num
+            return
+
+        catalog = get_showcase_catalog()
+        replayed = catalog.replay(search_query, sort_by, page_num)
+        if replayed is not None:
+            Tracing.count("browser.catalog_hits")
+            self.set_models(replayed[0], replayed[1], page_num)
+            return
+
+        try:
+            with Tracing.span("browser.search", page=page_num):
+                response = HttpClient.get(base_url, params=params)
+        except Exception as e:
+            print(f"Failed to fetch data from Meshy API: {e}")
+            response = None
+        if response is not None and response.status_code == 200:
+            results = response.json()["result"]
+            self.set_models(results, len(results) > 0, page_num)
+            page_cache.put(key, (list(self.models.values()), self.has_next_page))
+            catalog.add_page(
+                results, search_query, sort_by, page_num, PAGE_SIZE, self.has_next_page
+            )
         else:
-            print("Failed to fetch data from Meshy API")
-            self.has_next_page = False
+            if response is not None:
+                print("Failed to fetch data from Meshy API")
+            self.search_catalog(page_num, search_query, sort_by)
+
+    # Offline or without a server: the catalog's own search
+    def search_catalog(self, page_num, search_query, sort_by):
+        with Tracing.span("browser.catalog_search", page=page_num):
+            results, has_next_page = get_showcase_catalog().search(
+                search_query, sort_by, page_num, PAGE_SIZE
+            )
+        self.set_models(results, has_next_page, page_num)
 
-    def download_thumbnail(self, model):
-        """Download thumbnail to a local path."""
-        thumbnail_path = os.path.join(self.thumbnail_dir, f"{model.id}.jpeg")
+    def set_models(self, results, has_next_page, page_num):
+        self.models = OrderedDict()
+        for model_data in results:
+            model = MeshyModel(model_data)
+            self.models[model.id] = model
+        self.has_next_page = has_next_page
+        self.page_num = page_num
 
-        response = requests.get(model.thumbnail_url, stream=True)
-        if response.status_code == 200:
-            with open(thumbnail_path, "wb") as f:
-                f.write(response.content)
+    def download_thumbnail(self, model):
+        """Download thumbnail to a local path, reusing the on-disk cache."""
+        with Tracing.span("browser.thumbnail"):
+            thumbnail_path = get_thumbnail_cache().fetch(model.id, model.thumbnail_url)
+        if thumbnail_path:
             model.thumbnail_path = thumbnail_path
         else:
             print(f"Failed to download thumbnail for {model.name}")
 
 
+# Result pages keyed by (query, sort_by, page), kept for PAGE_CACHE_TTL seconds
+class PageCache:
+    def __init__(self, ttl=PAGE_CACHE_TTL):
+        self.ttl = ttl
+        self._pages = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._pages.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry[0] > self.ttl:
+                del self._pages[key]
+                return None
+            return entry[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._pages[key] = (time.time(), value)
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+
+
+page_cache = PageCache()
+
+
+# Runs Asset Browser searches. Every request gets a generation number and
+# only the newest one is applied, typing is debounced, and a page that is
+# already being fetched is not requested a second time.
+class SearchController:
+    def __init__(self):
+        self.generation = 0
+        self._wanted = None
+        self._inflight = set()
+
+    def request(self, page_num, debounce=0.0):
+        self.generation += 1
+        generation = self.generation
+        # Thumbnails still queued for the superseded search are dropped
+        thumbnail_executor.new_generation()
+        if debounce > 0:
+            dispatcher.call_later(debounce, self._run, generation, page_num)
+        else:
+            self._run(generation, page_num)
+
+    def _run(self, generation, page_num):
+        if generation != self.generation:
+            return
+        props = bpy.context.window_manager.meshy_browser
+        key = (props.user_input, props.sort_by, page_num)
+        self._wanted = (generation, key)
+        offline = props.offline
+
+        cached = None if offline else page_cache.get(key)
+        if cached is not None:
+            self._apply(props, key, *cached)
+            return
+
+        props.is_loading = True
+        set_cursor("WAIT")
+        if key in self._inflight:
+            return
+        self._inflight.add(key)
+
+        def search():
+            api = MeshyApi()
+            api.fetch_model_data(page_num, key[0], key[1], offline)
+            return list(api.models.values()), api.has_next_page
+
+        dispatcher.submit(search, on_done=lambda future: self._finished(key, future))
+
+    def _finished(self, key, future):
+        self._inflight.discard(key)
+        if self._wanted is None or self._wanted[1] != key:
+            return
+        if self._wanted[0] != self.generation:
+            return
+        try:
+            results = future.result()
+        except Exception as e:
+            print(f"Failed to fetch data from Meshy API: {e}")
+            results = ([], False)
+        self._apply(bpy.context.window_manager.meshy_browser, key, *results)
+
+    def _apply(self, props, key, models, has_next_page):
+        self._wanted = None
+        props.is_loading = False
+        set_cursor("DEFAULT")
+        user_input, sort_by, page_num = key
+        apply_results(props, user_input, sort_by, page_num, models, has_next_page)
+
+
+def set_cursor(cursor):
+    if bpy.context.window is not None:
+        bpy.context.window.cursor_set(cursor)
+
+
+search_controller = SearchController()
+
+
+# Search-as-you-type, waits until typing pauses
+def update_search(self, context):
+    search_controller.request(1, debounce=SEARCH_DEBOUNCE)
+
+
 class MeshyBrowserProps(PropertyGroup):
-    user_input: StringProperty(name="Search", description="Search Query", default="")
+    user_input: StringProperty(
+        name="Search",
+        description="Search Query",
+        default="",
+        options={"TEXTEDIT_UPDATE"},
+        update=update_search,
+    )
     search_results = {}
     page_num: IntProperty(name="Page Number", default=1)
     has_next_page: BoolProperty(name="Has Next Page", default=False)
@@ -88,6 +252,13 @@ class MeshyBrowserProps(PropertyGroup):
         ],
         description="Sort by",
         default="-created_at",
+        update=update_search,
+    )
+    offline: BoolProperty(
+        name="Offline",
+        description="Search only the showcases seen before, without the server",
+        default=False,
+        update=update_search,
     )
 
 
@@ -96,107 +267,61 @@ class MeshySearchOperator(Operator):
     bl_label = "Search Meshy Library"
 
     def execute(self, context):
-        props = context.window_manager.meshy_browser
-        props.is_loading = True
-        bpy.context.window.cursor_set("WAIT")
-
-        search_thread = threading.Thread(target=self.search_in_thread, args=(context,))
-        search_thread.start()
+        search_controller.request(1)
         return {"FINISHED"}
 
-    def search_in_thread(self, context):
-        props = context.window_manager.meshy_browser
-        api = MeshyApi()
-        user_input = props.user_input
-        sort_by = props.sort_by
-
-        api.fetch_model_data(
-            page_num=api.page_num, search_query=user_input, sort_by=sort_by
-        )
-
-        def update_results():
-            props.search_results.clear()
-            for model_id, model in api.models.items():
-                props.search_results[model_id] = model
-            props.has_next_page = api.has_next_page
-            props.page_num = api.page_num
-
-            props.is_loading = False
-            bpy.context.window.cursor_set("DEFAULT")
-
-            bpy.ops.wm.meshy_load_thumbnails("INVOKE_DEFAULT")
-
-        bpy.app.timers.register(update_results, first_interval=0.1)
-
 
 class MeshyNextPageOperator(Operator):
     bl_idname = "wm.meshy_next_page"
     bl_label = "Next Page"
 
     def execute(self, context):
-        props = context.window_manager.meshy_browser
-        props.is_loading = True
-        bpy.context.window.cursor_set("WAIT")
-
-        next_page_thread = threading.Thread(
-            target=self.next_page_in_thread, args=(context,)
-        )
-        next_page_thread.start()
+        search_controller.request(context.window_manager.meshy_browser.page_num + 1)
         return {"FINISHED"}
 
-    def next_page_in_thread(self, context):
-        props = context.window_manager.meshy_browser
-        api = MeshyApi()
-        api.fetch_model_data(page_num=props.page_num + 1, search_query=props.user_input)
-
-        def update_results():
-            props.search_results.clear()
-            for model_id, model in api.models.items():
-                props.search_results[model_id] = model
-            props.has_next_page = api.has_next_page
-            props.page_num = api.page_num
-
-            props.is_loading = False
-            bpy.context.window.cursor_set("DEFAULT")
-
-            bpy.ops.wm.meshy_load_thumbnails("INVOKE_DEFAULT")
-
-        bpy.app.timers.register(update_results, first_interval=0.1)
-
 
 class MeshyPrevPageOperator(Operator):
     bl_idname = "wm.meshy_prev_page"
     bl_label = "Previous Page"
 
     def execute(self, context):
-        props = context.window_manager.meshy_browser
-        props.is_loading = True
-        bpy.context.window.cursor_set("WAIT")
-
-        prev_page_thread = threading.Thread(
-            target=self.prev_page_in_thread, args=(context,)
-        )
-        prev_page_thread.start()
+        search_controller.request(context.window_manager.meshy_browser.page_num - 1)
         return {"FINISHED"}
 
-    def prev_page_in_thread(self, context):
-        props = context.window_manager.meshy_browser
-        api = MeshyApi()
-        api.fetch_model_data(page_num=props.page_num - 1, search_query=props.user_input)
 
-        def update_results():
-            props.search_results.clear()
-            for model_id, model in api.models.items():
-                props.search_results[model_id] = model
-            props.has_next_page = api.has_next_page
-            props.page_num = api.page_num
+def apply_results(props, user_input, sort_by, page_num, models, has_next_page):
+    props.search_results.clear()
+    for model in models:
+        props.search_results[model.id] = model
+    props.has_next_page = has_next_page
+    props.page_num = page_num
+    preview_store.set_visible(props.search_results)
+    result_items.invalidate()
+
+    bpy.ops.wm.meshy_load_thumbnails("INVOKE_DEFAULT")
+
+    if has_next_page and not props.offline:
+        prefetch_page(user_input, sort_by, page_num + 1)
 
-            props.is_loading = False
-            bpy.context.window.cursor_set("DEFAULT")
 
-            bpy.ops.wm.meshy_load_thumbnails("INVOKE_DEFAULT")
+# Fetch a page and its thumbnails into the caches ahead of time
+def prefetch_page(user_input, sort_by, page_num):
+    if page_cache.get((user_input, sort_by, page_num)) is not None:
+        return
 
-        bpy.app.timers.register(update_results, first_interval=0.1)
+    def prefetch():
+        api = MeshyApi()
+        api.fetch_model_data(
+            page_num=page_num, search_query=user_input, sort_by=sort_by
+        )
+        for model in api.models.values():
+            thumbnail_executor.submit(
+                None,
+                lambda model=model: api.download_thumbnail(model),
+                PRIORITY_BACKGROUND,
+            )
+
+    dispatcher.submit(prefetch)
 
 
 class MeshyLoadThumbnailsOperator(Operator):
@@ -205,50 +330,61 @@ class MeshyLoadThumbnailsOperator(Operator):
 
     def execute(self, context):
         props = context.window_manager.meshy_browser
+        # Queued downloads of the previous page are dropped from here on
+        generation = thumbnail_executor.new_generation()
+        api = MeshyApi()
         for model in props.search_results.values():
-            threading.Thread(target=self.download_thumbnail, args=(model,)).start()
+            thumbnail_executor.submit(
+                generation,
+                lambda model=model: self.download_thumbnail(api, model, generation),
+            )
         return {"FINISHED"}
 
-    def download_thumbnail(self, model):
-        api = MeshyApi()
+    @staticmethod
+    def download_thumbnail(api, model, generation):
         api.download_thumbnail(model)
-        preview_collection["meshy"][model.id] = bpy.utils.previews.new().load(
-            model.id, model.thumbnail_path, "IMAGE"
-        )
+        if not model.thumbnail_path:
+            return
+
+        # Show each thumbnail in the grid as soon as it arrives
+        def show_thumbnail():
+            if thumbnail_executor.is_current(generation):
+                preview_store.show(model.id, model.thumbnail_path)
+                result_items.invalidate()
+                dispatcher.request_redraw()
+
+        dispatcher.call_soon(show_thumbnail)
 
 
-class MeshyDownloadModelOperator(Operator):
+class MeshyDownloadModelOperator(ModalDownloadOperator, Operator):
     bl_idname = "wm.meshy_download_model"
     bl_label = "Import Model"
+    progress_owner = "browser"
 
-    def execute(self, context):
+    def download_source(self, context):
         props = context.window_manager.meshy_browser
         selected_model_name = context.window_manager.meshy_results
 
-        if selected_model_name in props.search_results:
-            model = props.search_results[selected_model_name]
-            model_path = os.path.join(bpy.app.tempdir, f"{model.name}.glb")
-
-            response = requests.get(model.model_url, stream=True)
-            if response.status_code == 200:
-                with open(model_path, "wb") as f:
-                    f.write(response.content)
-                self.import_model(model_path, model.name)
-                self.report(
-                    {"INFO"},
-                    f"Model {model.name} downloaded and imported successfully.",
-                )
-            else:
-                self.report({"ERROR"}, f"Failed to download model {model.name}.")
-        else:
+        if selected_model_name not in props.search_results:
             self.report({"ERROR"}, "No model selected.")
-
+            return None
+        model = props.search_results[selected_model_name]
+        self._model_name = model.name
+        self.thumbnail_url = model.thumbnail_url
+        return model.id, model.model_url, model.name
+
+    def import_result(self, context, filepath):
+        self.import_model(filepath, self._model_name)
+        self.report(
+            {"INFO"},
+            f"Model {self._model_name} downloaded and imported successfully.",
+        )
         return {"FINISHED"}
 
     def import_model(self, model_path, model_name):
         print(f"Importing model from {model_path}")
         print(f"Model name: {model_name}")
-        bpy.ops.import_scene.gltf(filepath=model_path)
+        import_glb(model_path)
         bpy.context.active_object.name = model_name
         bpy.context.active_object.data.name = model_name
 
@@ -260,12 +396,15 @@ class MeshyAssetBrowserPanel(Panel):
     bl_region_type = "UI"
     bl_category = "Meshy"
 
+    @Tracing.traced("draw.asset_browser")
     def draw(self, context):
         layout = self.layout
         props = context.window_manager.meshy_browser
 
         layout.prop(props, "user_input", text="Search")
-        layout.prop(props, "sort_by", text="Sort by")
+        row = layout.row()
+        row.prop(props, "sort_by", text="Sort by")
+        row.prop(props, "offline", toggle=True, icon="INTERNET_OFFLINE")
 
         row = layout.row()
         row.enabled = not props.is_loading
@@ -273,13 +412,16 @@ class MeshyAssetBrowserPanel(Panel):
 
         if props.is_loading:
             layout.label(text="Loading... Please wait.", icon="INFO")
+        elif props.offline:
+            count = len(get_showcase_catalog())
+            layout.label(text=f"{count} showcases in the local catalog", icon="INFO")
 
         if props.search_results:
             layout.template_icon_view(
                 context.window_manager, "meshy_results", show_labels=True
             )
 
-        if not preview_collection["meshy"] and not props.is_loading:
+        if not props.search_results and not props.is_loading:
             layout.label(text="No results found")
 
         row = layout.row()
@@ -305,6 +447,7 @@ class MeshyAssetBrowserPanel(Panel):
 
                 layout.label(text=f"Author: {selected_model.author}", icon="USER")
 
+                draw_import_options(layout, context.scene)
                 row = layout.row()
                 row.scale_y = 1.5
                 row.operator(
@@ -313,26 +456,44 @@ class MeshyAssetBrowserPanel(Panel):
                     icon="IMPORT",
                 )
 
+        draw_downloads(layout, "browser")
+
+
+# Items of the result grid enum. Blender asks for them on every redraw, they
+# are only rebuilt after invalidate() (new results, a thumbnail arrived).
+# Holding on to the list also keeps its strings alive while Blender uses them.
+class ResultItems:
+    def __init__(self):
+        self.generation = 0
+        self._built = -1
+        self._items = []
+
+    def invalidate(self):
+        self.generation += 1
+
+    def get(self, props):
+        if self._built != self.generation:
+            self._items = self._build(props)
+            self._built = self.generation
+        return self._items
+
+    @staticmethod
+    def _build(props):
+        items = []
+        for i, (model_id, model) in enumerate(props.search_results.items()):
+            icon_id = preview_store.icon_id(model_id)
+            if icon_id:
+                items.append((model_id, model.name, "", icon_id, i))
+            else:
+                items.append((model_id, model.name, "", "QUESTION", i))
+        return items
+
+
+result_items = ResultItems()
+
 
 def list_meshy_results(self, context):
-    props = context.window_manager.meshy_browser
-    if not preview_collection.get("meshy"):
-        preview_collection["meshy"] = bpy.utils.previews.new()
-    items = []
-    for i, (model_id, model) in enumerate(props.search_results.items()):
-        if model.thumbnail_path:
-            items.append(
-                (
-                    model_id,
-                    model.name,
-                    "",
-                    preview_collection["meshy"][model_id].icon_id,
-                    i,
-                )
-            )
-        else:
-            items.append((model_id, model.name, "", "QUESTION", i))
-    return items
+    return result_items.get(context.window_manager.meshy_browser)
 
 
 classes = (
@@ -361,12 +522,12 @@ def unregister():
     del bpy.types.WindowManager.meshy_browser
     del bpy.types.WindowManager.meshy_results
 
-    api = MeshyApi()
-    if os.path.exists(api.thumbnail_dir):
-        shutil.rmtree(api.thumbnail_dir)
+    thumbnail_executor.shutdown()
+
+    # Thumbnails stay on disk so the next session starts with a warm cache
+    flush_caches()
 
-    if "meshy" in preview_collection:
-        bpy.utils.previews.remove(preview_collection["meshy"])
+    preview_store.close()
 
 
 if __name__ == "__main__":
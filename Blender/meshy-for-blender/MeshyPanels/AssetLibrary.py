@@ -0,0 +1,123 @@
+import bpy
+import hashlib
+import os
+from array import array
+from .ImportPipeline import import_glb
+
+LIBRARY_DIR_NAME = "meshy_library"
+PREVIEW_SIZE = 256
+
+
+def library_dir():
+    return bpy.utils.user_resource("SCRIPTS", path=LIBRARY_DIR_NAME, create=True)
+
+
+def asset_key(model_id, url=""):
+    if model_id:
+        return model_id
+    return hashlib.sha1(url.split("?")[0].encode("utf-8")).hexdigest()[:16]
+
+
+def blend_path(key):
+    return os.path.join(library_dir(), f"{key}.blend")
+
+
+def collection_name(key):
+    return f"meshy_{key}"
+
+
+def has_asset(key):
+    return os.path.isfile(blend_path(key))
+
+
+# Use an image file, scaled down to icon size, as the preview of id_block
+def set_preview_from_image(id_block, image_path, size=PREVIEW_SIZE):
+    image = bpy.data.images.load(image_path, check_existing=False)
+    try:
+        image.scale(size, size)
+        pixels = array("f", [0.0]) * (size * size * 4)
+        image.pixels.foreach_get(pixels)
+        preview = id_block.preview_ensure()
+        preview.image_size = (size, size)
+        preview.image_pixels_float.foreach_set(pixels)
+    finally:
+        bpy.data.images.remove(image)
+
+
+# Import the GLB once into its own collection, marked as an asset with the
+# model thumbnail as preview, and write it to <library>/<key>.blend
+def build_asset(key, name, glb_path, thumbnail_path=None):
+    collection = bpy.data.collections.new(collection_name(key))
+    images_before = set(bpy.data.images)
+    imported = import_glb(glb_path)
+    # Textures the import added, shared ones it reused are left alone
+    images = set(bpy.data.images) - images_before
+    for obj in imported:
+        for users_collection in list(obj.users_collection):
+            users_collection.objects.unlink(obj)
+        collection.objects.link(obj)
+    if hasattr(collection, "asset_mark"):
+        collection.asset_mark()
+        collection.asset_data.description = name
+        if thumbnail_path:
+            set_preview_from_image(collection, thumbnail_path)
+    bpy.data.libraries.write(blend_path(key), {collection}, fake_user=True)
+
+    # The file keeps everything, drop the local copies again
+    meshes = {obj.data for obj in imported if obj.type == "MESH"}
+    materials = {
+        slot.material
+        for obj in imported
+        for slot in obj.material_slots
+        if slot.material
+    }
+    bpy.data.batch_remove([collection, *imported, *meshes, *materials, *images])
+
+
+# The asset collection linked into this file, linking it on first use
+def linked_collection(key):
+    path = blend_path(key)
+    name = collection_name(key)
+    for collection in bpy.data.collections:
+        if (
+            collection.name == name
+            and collection.library is not None
+            and os.path.normpath(bpy.path.abspath(collection.library.filepath))
+            == os.path.normpath(path)
+        ):
+            return collection
+    with bpy.data.libraries.load(path, link=True) as (data_from, data_to):
+        data_to.collections = [name]
+    return data_to.collections[0]
+
+
+# Add an instance of the library asset at the 3D cursor. Only the first
+# placement of a model imports it, later ones just add an empty.
+def place_instance(context, key, name, glb_path=None, thumbnail_path=None):
+    if not has_asset(key):
+        build_asset(key, name, glb_path, thumbnail_path)
+    instance = bpy.data.objects.new(name, None)
+    instance.instance_type = "COLLECTION"
+    instance.instance_collection = linked_collection(key)
+    instance.location = context.scene.cursor.location
+    context.collection.objects.link(instance)
+    for obj in context.selected_objects:
+        obj.select_set(False)
+    instance.select_set(True)
+    context.view_layer.objects.active = instance
+    return instance
+
+
+def register():
+    bpy.types.Scene.meshy_use_library = bpy.props.BoolProperty(
+        name="Import To Library",
+        description=(
+            "Import each model once into a local asset library and place "
+            "linked instances of it"
+        ),
+        default=False,
+    )
+
+
+def unregister():
+    del bpy.types.Scene.meshy_use_library
@@ -0,0 +1,125 @@
+import csv
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BATCH_FIELDS = ("prompt", "negative_prompt", "art_style", "seed", "name")
+
+
+# Rows of a CSV (with a header line) or a JSON list of objects
+def read_batch_file(filepath):
+    with open(filepath, "r", encoding="utf-8-sig", newline="") as f:
+        if filepath.lower().endswith(".json"):
+            rows = json.load(f)
+            if isinstance(rows, dict):
+                rows = rows.get("rows", [])
+        else:
+            rows = list(csv.DictReader(f))
+    if not isinstance(rows, list):
+        raise ValueError("expected a list of rows")
+    result = []
+    for number, row in enumerate(rows, 1):
+        if not isinstance(row, dict):
+            raise ValueError(f"row {number} is not an object with a prompt field")
+        row = {str(k).strip().lower(): v for k, v in row.items() if k}
+        result.append(
+            {
+                field: "" if row.get(field) is None else str(row.get(field)).strip()
+                for field in BATCH_FIELDS
+            }
+        )
+    return result
+
+
+class BatchRow:
+    def __init__(self, index, data):
+        self.index = index
+        self.data = data
+        self.status = "QUEUED"
+        self.task_id = ""
+        self.error = ""
+        self.seconds = 0.0
+
+
+# Submits every row through submit(row_data) -> task id, at most
+# `concurrency` at a time, on background threads.
+class BatchJob:
+    def __init__(self, rows, submit, concurrency):
+        self.rows = [BatchRow(i, data) for i, data in enumerate(rows)]
+        self.submit = submit
+        self.concurrency = max(1, concurrency)
+        self.started = 0.0
+        self.finished = 0.0
+        self.cancel_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.started = time.time()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            for row in self.rows:
+                pool.submit(self._submit_row, row)
+        self.finished = time.time()
+
+    def _submit_row(self, row):
+        if self.cancel_event.is_set() or not row.data["prompt"]:
+            row.status = "SKIPPED"
+            return
+        row.status = "SUBMITTING"
+        started = time.time()
+        try:
+            row.task_id = self.submit(row.data)
+            row.status = "SUBMITTED"
+        except Exception as e:
+            row.status = "FAILED"
+            row.error = str(e)
+        row.seconds = time.time() - started
+
+    def count(self, status):
+        return sum(1 for row in self.rows if row.status == status)
+
+    @property
+    def task_ids(self):
+        return [row.task_id for row in self.rows if row.task_id]
+
+    # Submitted rows per second since the job started
+    @property
+    def throughput(self):
+        elapsed = (self.finished or time.time()) - self.started
+        return self.count("SUBMITTED") / elapsed if elapsed > 0 else 0.0
+
+    def summary(self):
+        return (
+            f"{self.count('SUBMITTED')}/{len(self.rows)} submitted, "
+            f"{self.count('FAILED')} failed, {self.throughput:.1f} tasks/s"
+        )
+
+    # Write one result per row next to the batch file
+    def write_results(self, filepath):
+        results = [
+            {
+                "row": row.index + 1,
+                "name": row.data.get("name", ""),
+                "status": row.status,
+                "task_id": row.task_id,
+                "error": row.error,
+                "seconds": round(row.seconds, 3),
+            }
+            for row in self.rows
+        ]
+        path = os.path.splitext(filepath)[0] + ".results.json"
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        return path
@@ -0,0 +1,317 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from email.utils import formatdate
+from urllib.parse import urlsplit
+from . import HttpClient
+from .Download import stream_to_file
+from .ShowcaseCatalog import ShowcaseCatalog
+
+INDEX_FILE = "index.json"
+
+# Thumbnails newer than this are served without asking the server
+THUMBNAIL_FRESH_SECONDS = 7 * 24 * 3600
+THUMBNAIL_CACHE_BYTES = 256 * 1024 * 1024
+MODEL_CACHE_BYTES = 2 * 1024 * 1024 * 1024
+HASH_CHUNK = 1024 * 1024
+
+
+def url_digest(url):
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
+
+
+# Cache key of an asset url. Signed asset urls change their query on every
+# request, so only the host and path take part.
+def url_key(model_id, url):
+    parts = urlsplit(url)
+    return f"{model_id}:{parts.netloc}{parts.path}"
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Files in one directory tracked by a json index and evicted least
+# recently used first once the directory grows beyond max_bytes.
+class DiskCache:
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.RLock()
+        self._entries = None
+        self._dirty = False
+
+    @property
+    def index_path(self):
+        return os.path.join(self.directory, INDEX_FILE)
+
+    def _load(self):
+        if self._entries is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError):
+            self._entries = {}
+        # Forget entries whose file is gone, delete files nobody indexes
+        known = set()
+        for key, entry in list(self._entries.items()):
+            if os.path.isfile(self.path_of(entry)):
+                known.add(entry["file"])
+            else:
+                del self._entries[key]
+        for name in os.listdir(self.directory):
+            if name != INDEX_FILE and name not in known:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+    def path_of(self, entry):
+        return os.path.join(self.directory, entry["file"])
+
+    def get(self, key):
+        with self._lock:
+            self._load()
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if not os.path.isfile(self.path_of(entry)):
+                del self._entries[key]
+                self._dirty = True
+                return None
+            entry["used"] = time.time()
+            self._dirty = True
+            return dict(entry)
+
+    # Move a finished file at tmp_path into the cache under key
+    def put(self, key, tmp_path, file_name, **meta):
+        with self._lock:
+            self._load()
+            path = os.path.join(self.directory, file_name)
+            if tmp_path != path:
+                os.replace(tmp_path, path)
+            entry = dict(meta)
+            entry.update(
+                file=file_name,
+                size=os.path.getsize(path),
+                used=time.time(),
+            )
+            self._entries[key] = entry
+            self._evict(keep=key)
+            self.flush(force=True)
+            return dict(entry)
+
+    def update(self, key, **meta):
+        with self._lock:
+            self._load()
+            if key in self._entries:
+                self._entries[key].update(meta)
+                self._dirty = True
+
+    def remove(self, key):
+        with self._lock:
+            self._load()
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._dirty = True
+                self._delete_file(entry)
+
+    # Several keys may share one file, only delete it with its last user
+    def _delete_file(self, entry):
+        if any(e["file"] == entry["file"] for e in self._entries.values()):
+            return
+        try:
+            os.remove(self.path_of(entry))
+        except OSError:
+            pass
+
+    def _file_sizes(self):
+        return {entry["file"]: entry["size"] for entry in self._entries.values()}
+
+    def temp_path(self, file_name):
+        os.makedirs(self.directory, exist_ok=True)
+        return os.path.join(self.directory, f"{file_name}.{threading.get_ident()}.part")
+
+    def total_bytes(self):
+        with self._lock:
+            self._load()
+            return sum(self._file_sizes().values())
+
+    def _evict(self, keep=None):
+        total = sum(self._file_sizes().values())
+        by_age = sorted(self._entries.items(), key=lambda item: item[1]["used"])
+        for key, entry in by_age:
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            del self._entries[key]
+            if entry["file"] not in self._file_sizes():
+                total -= entry["size"]
+            self._delete_file(entry)
+
+    def flush(self, force=False):
+        with self._lock:
+            if self._entries is None or not (self._dirty or force):
+                return
+            tmp_path = self.index_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_path, self.index_path)
+            self._dirty = False
+
+
+# Thumbnails keyed by model id and url without its query, revalidated with
+# ETag and Last-Modified once they are older than THUMBNAIL_FRESH_SECONDS.
+class ThumbnailCache(DiskCache):
+    def __init__(self, directory, max_bytes=THUMBNAIL_CACHE_BYTES):
+        super().__init__(directory, max_bytes)
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+
+    def fetch(self, model_id, url):
+        key = url_key(model_id, url)
+        entry = self.get(key)
+        now = time.time()
+        if entry is not None and now - entry["validated"] < THUMBNAIL_FRESH_SECONDS:
+            self.hits += 1
+            return self.path_of(entry)
+
+        headers = {}
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            headers["If-Modified-Since"] = entry.get("last_modified") or formatdate(
+                entry["validated"], usegmt=True
+            )
+
+        try:
+            response = HttpClient.get(url, headers=headers)
+        except Exception as e:
+            print(f"Failed to download thumbnail {url}: {e}")
+            return self.path_of(entry) if entry is not None else None
+
+        if response.status_code == 304 and entry is not None:
+            self.revalidated += 1
+            self.update(key, validated=now)
+            return self.path_of(entry)
+        if response.status_code != 200:
+            return self.path_of(entry) if entry is not None else None
+
+        self.misses += 1
+        file_name = f"{model_id}-{url_digest(key)}.jpeg"
+        tmp_path = self.temp_path(file_name)
+        with open(tmp_path, "wb") as f:
+            f.write(response.content)
+        entry = self.put(
+            key,
+            tmp_path,
+            file_name,
+            validated=now,
+            etag=response.headers.get("ETag", ""),
+            last_modified=response.headers.get("Last-Modified", ""),
+        )
+        return self.path_of(entry)
+
+
+# Downloaded GLBs stored by content hash and looked up by task/model id and
+# url without its query.
+class ModelCache(DiskCache):
+    def __init__(self, directory, max_bytes=MODEL_CACHE_BYTES):
+        super().__init__(directory, max_bytes)
+        self._verified = set()
+
+    # Path of a cached model without checking its content, cheap enough for
+    # the main thread. fetch() and lookup() verify the hash.
+    def peek(self, model_id, url):
+        entry = self.get(url_key(model_id, url))
+        return None if entry is None else self.path_of(entry)
+
+    # Path of a cached model whose content still matches its hash
+    def lookup(self, model_id, url):
+        key = url_key(model_id, url)
+        entry = self.get(key)
+        if entry is None:
+            return None
+        path = self.path_of(entry)
+        if entry["sha256"] not in self._verified:
+            if (
+                os.path.getsize(path) != entry["size"]
+                or file_sha256(path) != entry["sha256"]
+            ):
+                print(f"Cached model {path} is corrupted, downloading it again")
+                self.remove(key)
+                return None
+            self._verified.add(entry["sha256"])
+        return path
+
+    # Store a downloaded file whose sha256 is already known
+    def store(self, model_id, url, tmp_path, sha256):
+        file_name = f"{sha256}.glb"
+        if os.path.isfile(os.path.join(self.directory, file_name)):
+            os.remove(tmp_path)
+            tmp_path = os.path.join(self.directory, file_name)
+        entry = self.put(url_key(model_id, url), tmp_path, file_name, sha256=sha256)
+        self._verified.add(sha256)
+        return self.path_of(entry)
+
+    def fetch(self, model_id, url, progress=None):
+        path = self.lookup(model_id, url)
+        if path is not None:
+            return path
+        tmp_path = self.temp_path(f"{model_id}.glb")
+        sha256 = stream_to_file(url, tmp_path, progress)
+        return self.store(model_id, url, tmp_path, sha256)
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+# Directory holding the caches, Blender's user scripts folder unless set
+_cache_root = None
+
+
+def set_cache_root(directory):
+    global _cache_root
+    with _caches_lock:
+        _cache_root = directory
+        _caches.clear()
+
+
+def _user_cache(name, factory):
+    with _caches_lock:
+        if name not in _caches:
+            if _cache_root is not None:
+                directory = os.path.join(_cache_root, name)
+            else:
+                import bpy
+
+                directory = bpy.utils.user_resource("SCRIPTS", path=name, create=True)
+            _caches[name] = factory(directory)
+        return _caches[name]
+
+
+def get_thumbnail_cache():
+    return _user_cache("meshy_thumbnails", ThumbnailCache)
+
+
+def get_model_cache():
+    return _user_cache("meshy_models", ModelCache)
+
+
+def get_showcase_catalog():
+    return _user_cache("meshy_catalog", ShowcaseCatalog)
+
+
+def flush_caches():
+    with _caches_lock:
+        for cache in _caches.values():
+            cache.flush()
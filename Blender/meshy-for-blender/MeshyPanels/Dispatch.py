@@ -0,0 +1,152 @@
+import bpy
+import heapq
+import itertools
+import queue
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from . import Tracing
+from .Utils import redraw_panels
+
+# Worker threads for short requests (searches, prefetches, task calls)
+WORKERS = 8
+# Worker threads for model downloads, which hold theirs for a long time
+TRANSFER_WORKERS = 4
+# Seconds of main-thread work per tick, the rest waits for the next tick
+TICK_BUDGET = 0.008
+BUSY_INTERVAL = 0.01
+IDLE_INTERVAL = 0.1
+
+
+# Background work and its results. Workers never touch bpy: they hand
+# callbacks to call_soon() and a single persistent timer runs them on the
+# main thread, at most TICK_BUDGET seconds' worth per tick so a burst of
+# results (a page of thumbnails) cannot stall the UI. Delayed and periodic
+# main-thread work goes through call_later() on the same timer.
+class Dispatcher:
+    def __init__(self, workers=WORKERS, transfer_workers=TRANSFER_WORKERS):
+        self.workers = workers
+        self.transfer_workers = transfer_workers
+        self._executors = {}
+        self._executor_lock = threading.Lock()
+        self._queue = queue.SimpleQueue()
+        self._later = []
+        self._later_lock = threading.Lock()
+        self._order = itertools.count()
+        self._redraw = threading.Event()
+        self._watched = []
+        # bpy.app.timers knows a timer by the callable's identity and every
+        # self.tick is a new bound method, so one is kept
+        self._tick = self.tick
+
+    def _get_executor(self, name, workers):
+        with self._executor_lock:
+            if name not in self._executors:
+                self._executors[name] = ThreadPoolExecutor(
+                    max_workers=workers, thread_name_prefix=f"meshy-{name}"
+                )
+            return self._executors[name]
+
+    def _submit(self, executor, func, args, on_done):
+        future = executor.submit(func, *args)
+        if on_done is not None:
+            future.add_done_callback(lambda f: self.call_soon(on_done, f))
+        return future
+
+    # Run func on a worker. on_done(future) is called on the main thread.
+    def submit(self, func, *args, on_done=None):
+        executor = self._get_executor("worker", self.workers)
+        return self._submit(executor, func, args, on_done)
+
+    # Like submit(), for downloads that would otherwise keep searches waiting
+    def submit_transfer(self, func, *args, on_done=None):
+        executor = self._get_executor("transfer", self.transfer_workers)
+        return self._submit(executor, func, args, on_done)
+
+    # Safe from any thread
+    def call_soon(self, func, *args):
+        self._queue.put((func, args))
+
+    # Run func on the main thread after delay seconds, safe from any thread
+    def call_later(self, delay, func, *args):
+        with self._later_lock:
+            entry = (time.monotonic() + delay, next(self._order), func, args)
+            heapq.heappush(self._later, entry)
+
+    # Safe from any thread, redraws of one tick are merged
+    def request_redraw(self):
+        self._redraw.set()
+
+    # Redraw every tick while is_running() returns true, checked on the
+    # main thread so it may look at bpy data
+    def watch(self, is_running):
+        self._watched.append(is_running)
+
+    def _queue_due(self):
+        now = time.monotonic()
+        with self._later_lock:
+            while self._later and self._later[0][0] <= now:
+                _, _, func, args = heapq.heappop(self._later)
+                self._queue.put((func, args))
+            return self._later[0][0] - now if self._later else None
+
+    def tick(self):
+        next_due = self._queue_due()
+        deadline = time.perf_counter() + TICK_BUDGET
+        ran = 0
+        # At least one callback per tick, however long it takes
+        while ran == 0 or time.perf_counter() < deadline:
+            try:
+                func, args = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                func(*args)
+            except Exception:
+                traceback.print_exc()
+            ran += 1
+        if ran:
+            Tracing.count("dispatch.callbacks", ran)
+        if self._watched:
+            self._watched = [w for w in self._watched if w()]
+            self._redraw.set()
+        if self._redraw.is_set():
+            self._redraw.clear()
+            redraw_panels()
+        if not self._queue.empty():
+            Tracing.count("dispatch.deferred_ticks")
+            return BUSY_INTERVAL
+        if next_due is not None:
+            return min(IDLE_INTERVAL, max(next_due, BUSY_INTERVAL))
+        return IDLE_INTERVAL
+
+    def start(self):
+        if not bpy.app.timers.is_registered(self._tick):
+            bpy.app.timers.register(self._tick, persistent=True)
+
+    def shutdown(self):
+        if bpy.app.timers.is_registered(self._tick):
+            bpy.app.timers.unregister(self._tick)
+        with self._executor_lock:
+            for executor in self._executors.values():
+                executor.shutdown(wait=False, cancel_futures=True)
+            self._executors.clear()
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        with self._later_lock:
+            self._later = []
+        self._watched = []
+
+
+dispatcher = Dispatcher()
+
+
+# Redraw the panels from any thread
+def redraw_soon():
+    dispatcher.request_redraw()
+
+
+# Keep redrawing the panels while a background job reports it is running
+def redraw_while(is_running):
+    dispatcher.watch(is_running)
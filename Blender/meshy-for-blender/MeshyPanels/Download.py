@@ -0,0 +1,132 @@
+import hashlib
+import os
+import threading
+import time
+from . import HttpClient
+from . import Tracing
+
+# Bytes held in memory per download, whatever the size of the file
+CHUNK_SIZE = 256 * 1024
+# How long a finished download stays listed in its panel
+KEEP_FINISHED_SECONDS = 10
+
+_downloads = {}
+_downloads_lock = threading.Lock()
+
+
+class DownloadCancelled(Exception):
+    pass
+
+
+def format_bytes(size):
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+# Progress of one download, written by the download thread and read by panels
+class DownloadProgress:
+    def __init__(self, name, owner):
+        self.name = name
+        self.owner = owner
+        self.total = 0
+        self.done = 0
+        self.started = time.time()
+        self.finished = None
+        self.error = ""
+        self.cancel_event = threading.Event()
+
+    @property
+    def rate(self):
+        elapsed = (self.finished or time.time()) - self.started
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta(self):
+        rate = self.rate
+        if not self.total or rate <= 0:
+            return None
+        return max(self.total - self.done, 0) / rate
+
+    @property
+    def fraction(self):
+        return self.done / self.total if self.total else 0.0
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def finish(self, error=""):
+        self.error = error
+        self.finished = time.time()
+
+    def text(self):
+        size = format_bytes(self.done)
+        if self.total:
+            size += f" / {format_bytes(self.total)}"
+        text = f"{size}  {format_bytes(self.rate)}/s"
+        if self.error:
+            return f"{text}  {self.error}"
+        if self.finished:
+            return f"{text}  done"
+        if self.eta is not None:
+            text += f"  ETA {self.eta:.0f}s"
+        return text
+
+
+def start_progress(name, owner):
+    progress = DownloadProgress(name, owner)
+    with _downloads_lock:
+        _downloads[id(progress)] = progress
+    return progress
+
+
+# Downloads of one panel, finished ones are dropped after a short while
+def downloads_of(owner):
+    now = time.time()
+    with _downloads_lock:
+        for key, progress in list(_downloads.items()):
+            if progress.finished and now - progress.finished > KEEP_FINISHED_SECONDS:
+                del _downloads[key]
+        return [p for p in _downloads.values() if p.owner == owner]
+
+
+def draw_downloads(layout, owner):
+    for progress in downloads_of(owner):
+        icon = "ERROR" if progress.error else "SORT_ASC"
+        layout.label(text=progress.name, icon=icon)
+        layout.label(text=progress.text())
+
+
+# Stream url into path chunk by chunk and return the sha256 of the content
+def stream_to_file(url, path, progress=None):
+    digest = hashlib.sha256()
+    size = 0
+    start = time.monotonic()
+    try:
+        with Tracing.span("download.stream") as args, HttpClient.get(
+            url, stream=True
+        ) as response:
+            response.raise_for_status()
+            if progress is not None:
+                progress.total = int(response.headers.get("Content-Length") or 0)
+            with open(path, "wb") as f:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    if progress is not None:
+                        if progress.cancel_event.is_set():
+                            raise DownloadCancelled(url)
+                        progress.done += len(chunk)
+                    size += len(chunk)
+                    digest.update(chunk)
+                    f.write(chunk)
+            args["size"] = size
+    except BaseException:
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+    elapsed = time.monotonic() - start
+    if elapsed > 0:
+        Tracing.observe("download.throughput", size / elapsed / 1e6, unit="MB/s")
+    Tracing.count("download.bytes", size)
+    return digest.hexdigest()
@@ -0,0 +1,59 @@
+import bpy
+import os
+from . import Tracing
+
+# Everything the texturing service does not look at: it only needs
+# geometry and UVs.
+MINIMAL_OPTIONS = {
+    "export_materials": "NONE",
+    "export_animations": False,
+    "export_skins": False,
+    "export_morph": False,
+    "export_cameras": False,
+    "export_lights": False,
+    "export_extras": False,
+    "export_attributes": False,
+    "export_colors": False,
+    "export_vertex_color": "NONE",
+    "export_texcoords": True,
+    "export_normals": True,
+}
+
+# Draco mesh compression with quantized vertex attributes
+DRACO_OPTIONS = {
+    "export_draco_mesh_compression_enable": True,
+    "export_draco_mesh_compression_level": 6,
+    "export_draco_position_quantization": 14,
+    "export_draco_normal_quantization": 10,
+    "export_draco_texcoord_quantization": 12,
+}
+
+EXPORT_PROFILES = [
+    ("MINIMAL", "Geometry + UVs", "Only upload what texturing needs"),
+    ("FULL", "Full", "Upload the selection with all of its data"),
+]
+
+
+# Options differ between Blender versions, drop the ones this one lacks
+def _supported(options):
+    known = bpy.ops.export_scene.gltf.get_rna_type().properties.keys()
+    return {key: value for key, value in options.items() if key in known}
+
+
+def export_options(profile, compress=False):
+    options = {}
+    if profile == "MINIMAL":
+        options.update(MINIMAL_OPTIONS)
+    if compress:
+        options.update(DRACO_OPTIONS)
+    return _supported(options)
+
+
+# Export the selected objects to filepath, returns the file size in bytes
+def export_selection(filepath, profile="MINIMAL", compress=False):
+    with Tracing.span("export.gltf", profile=profile, compress=compress) as args:
+        bpy.ops.export_scene.gltf(
+            filepath=filepath, use_selection=True, **export_options(profile, compress)
+        )
+        args["size"] = os.path.getsize(filepath)
+    return args["size"]
@@ -0,0 +1,289 @@
+import argparse
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+import bpy
+from . import HttpClient
+from .BatchSubmit import BatchJob, read_batch_file
+from .Cache import flush_caches, get_model_cache, set_cache_root
+from .Download import format_bytes
+from .ImportPipeline import import_glb
+from .MeshyClient import (
+    T2M_URL,
+    T2T_URL,
+    TaskFailed,
+    preview_payload,
+    refine_payload,
+    submit_text_to_model,
+    submit_text_to_texture,
+    wait_for_task,
+)
+from .TaskStore import TaskStore, TaskSync
+
+# Command line for render farms and CI, run through meshy_headless.py:
+#   blender -b --python meshy_headless.py -- generate --prompt "a chair" --import
+# Everything goes through the same client, caches and import pipeline as the
+# panels, but nothing reads scene properties or needs a window.
+KINDS = {"t2m": T2M_URL, "t2t": T2T_URL}
+
+
+def log(message):
+    print(f"[meshy] {message}", flush=True)
+
+
+# Options accepted before and after the command. The command's copy has no
+# defaults so it does not overwrite a value given before the command.
+def add_global_options(parser, defaults=True):
+    def default(value):
+        return value if defaults else argparse.SUPPRESS
+
+    parser.add_argument(
+        "--api-key", default=default(os.environ.get("MESHY_API_KEY", ""))
+    )
+    parser.add_argument(
+        "--cache-dir", default=default(""), help="defaults to Blender's"
+    )
+    parser.add_argument(
+        "--report", default=default(""), help="write the results as JSON"
+    )
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="meshy_headless.py", description="Meshy for Blender without the UI"
+    )
+    add_global_options(parser)
+    common = argparse.ArgumentParser(add_help=False)
+    add_global_options(common, defaults=False)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_result_options(command):
+        command.add_argument("--wait", action="store_true", help="until done")
+        command.add_argument("--timeout", type=float, default=None)
+        command.add_argument("--download", default="", help="copy GLBs here")
+        command.add_argument("--import", dest="import_models", action="store_true")
+        command.add_argument("--max-texture-size", type=int, default=0)
+        command.add_argument("--save", default="", help="save the .blend here")
+        command.add_argument("--concurrency", type=int, default=4)
+
+    generate = commands.add_parser(
+        "generate", help="create a text to model task", parents=[common]
+    )
+    generate.add_argument("--prompt", required=True)
+    generate.add_argument("--negative-prompt", default="")
+    generate.add_argument("--art-style", default="realistic")
+    generate.add_argument("--seed", default="")
+    generate.add_argument("--name", default="Meshy_model")
+    generate.add_argument("--refine", action="store_true")
+    add_result_options(generate)
+
+    batch = commands.add_parser(
+        "batch", help="one task per CSV/JSON row", parents=[common]
+    )
+    batch.add_argument("file")
+    batch.add_argument("--art-style", default="realistic")
+    batch.add_argument("--name", default="Meshy_model")
+    batch.add_argument("--refine", action="store_true")
+    add_result_options(batch)
+
+    texture = commands.add_parser(
+        "texture", help="texture a GLB file", parents=[common]
+    )
+    texture.add_argument("model")
+    texture.add_argument("--object-prompt", required=True)
+    texture.add_argument("--style-prompt", required=True)
+    texture.add_argument("--negative-prompt", default="")
+    texture.add_argument("--art-style", default="realistic")
+    texture.add_argument("--resolution", default="1024")
+    texture.add_argument("--enable-original-uv", action="store_true")
+    texture.add_argument("--enable-pbr", action="store_true")
+    texture.add_argument("--name", default="Meshy_texture")
+    add_result_options(texture)
+
+    download = commands.add_parser(
+        "download", help="fetch finished tasks", parents=[common]
+    )
+    download.add_argument("task_ids", nargs="+")
+    download.add_argument("--kind", choices=sorted(KINDS), default="t2m")
+    add_result_options(download)
+
+    listing = commands.add_parser(
+        "list", help="print the tasks of the account", parents=[common]
+    )
+    listing.add_argument("--kind", choices=sorted(KINDS), default="t2m")
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = parse_args(argv)
+    if not args.api_key:
+        log("No API key, pass --api-key or set MESHY_API_KEY")
+        return 2
+    HttpClient.set_api_key(args.api_key)
+    if args.cache_dir:
+        set_cache_root(os.path.abspath(args.cache_dir))
+
+    try:
+        if args.command == "list":
+            return list_tasks(args)
+        results = COMMANDS[args.command](args)
+    finally:
+        flush_caches()
+        HttpClient.close()
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        log(f"Report written to {args.report}")
+    return 0 if all(not r.get("error") for r in results) else 1
+
+
+def list_tasks(args):
+    store = TaskStore()
+    TaskSync(KINDS[args.kind], store).sync(HttpClient.auth_headers())
+    for task in store.tasks():
+        print(json.dumps({k: task.get(k) for k in ("id", "name", "mode", "status")}))
+    return 0
+
+
+def run_generate(args):
+    payload = preview_payload(
+        args.prompt, args.art_style, args.negative_prompt, args.name, args.seed
+    )
+    taskId = submit_text_to_model(payload)
+    log(f"Submitted task {taskId}")
+    return finish_tasks(args, T2M_URL, [{"id": taskId, "name": args.name}])
+
+
+def run_batch(args):
+    rows = read_batch_file(args.file)
+    headers = HttpClient.auth_headers()
+
+    def submit(row):
+        payload = preview_payload(
+            row["prompt"],
+            row["art_style"] or args.art_style,
+            row["negative_prompt"],
+            row["name"] or args.name,
+            row["seed"],
+        )
+        return submit_text_to_model(payload, headers, HttpClient.BULK_POOL)
+
+    job = BatchJob(rows, submit, args.concurrency)
+    job.start()
+    while job.running:
+        time.sleep(0.5)
+    log(job.summary())
+    log(f"Batch results written to {job.write_results(args.file)}")
+    submitted = [
+        {"id": row.task_id, "name": row.data["name"] or args.name, "row": row.index}
+        for row in job.rows
+        if row.task_id
+    ]
+    failed = [
+        {"row": row.index, "error": row.error}
+        for row in job.rows
+        if row.status == "FAILED"
+    ]
+    return finish_tasks(args, T2M_URL, submitted) + failed
+
+
+def run_texture(args):
+    fields = {
+        "object_prompt": args.object_prompt,
+        "style_prompt": args.style_prompt,
+        "enable_original_uv": args.enable_original_uv,
+        "enable_pbr": args.enable_pbr,
+        "negative_prompt": args.negative_prompt,
+        "resolution": args.resolution,
+        "art_style": args.art_style,
+        "name": args.name,
+    }
+    fileName = os.path.basename(args.model)
+    taskId = submit_text_to_texture(fields, fileName, args.model)
+    log(f"Submitted task {taskId}")
+    return finish_tasks(args, T2T_URL, [{"id": taskId, "name": args.name}])
+
+
+def run_download(args):
+    args.wait = True
+    tasks = [{"id": taskId, "name": taskId} for taskId in args.task_ids]
+    return finish_tasks(args, KINDS[args.kind], tasks)
+
+
+COMMANDS = {
+    "generate": run_generate,
+    "batch": run_batch,
+    "texture": run_texture,
+    "download": run_download,
+}
+
+
+# Wait for, download and import submitted tasks. Waiting and downloading run
+# in parallel, importing stays on the main thread.
+def finish_tasks(args, base_url, results):
+    refine = getattr(args, "refine", False)
+    # download always fetches into the model cache, even without a directory
+    fetch = args.download or args.import_models or args.command == "download"
+    wanted = args.wait or args.download or args.import_models or args.save or refine
+    if not wanted:
+        return results
+
+    def finish(result):
+        try:
+            task = wait_for_task(base_url, result["id"], timeout=args.timeout)
+            if refine:
+                result["preview_id"] = result["id"]
+                result["id"] = submit_text_to_model(
+                    refine_payload(result["id"], result["name"]),
+                    pool=HttpClient.BULK_POOL,
+                )
+                log(f"Refining {result['preview_id']} as {result['id']}")
+                task = wait_for_task(base_url, result["id"], timeout=args.timeout)
+            result["status"] = task["status"]
+            if fetch:
+                result["path"] = download_model(task, args.download, result["name"])
+                size = format_bytes(os.path.getsize(result["path"]))
+                log(f"Downloaded {result['id']} ({size}) to {result['path']}")
+        except (TaskFailed, TimeoutError) as e:
+            result["error"] = str(e)
+        except Exception as e:
+            result["error"] = f"{type(e).__name__}: {e}"
+        if result.get("error"):
+            log(f"{result['id']}: {result['error']}")
+        return result
+
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+        results = list(pool.map(finish, results))
+
+    if args.import_models:
+        for result in results:
+            if result.get("path"):
+                imported = import_glb(
+                    result["path"], dedupe=True, max_texture_size=args.max_texture_size
+                )
+                for obj in imported:
+                    if obj.parent is None:
+                        obj.name = result["name"]
+                result["objects"] = [obj.name for obj in imported]
+                log(f"Imported {result['id']} as {', '.join(result['objects'])}")
+    if args.save:
+        path = os.path.abspath(args.save)
+        bpy.ops.wm.save_as_mainfile(filepath=path)
+        log(f"Saved {path}")
+    return results
+
+
+# The GLB of a finished task through the model cache, copied to directory
+# when one is given
+def download_model(task, directory, name):
+    url = task["model_urls"]["glb"]
+    path = get_model_cache().fetch(task["id"], url)
+    if not directory:
+        return path
+    os.makedirs(directory, exist_ok=True)
+    target = os.path.join(directory, f"{name}_{task['id']}.glb")
+    shutil.copyfile(path, target)
+    return target
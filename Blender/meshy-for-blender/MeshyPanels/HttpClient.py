@@ -0,0 +1,170 @@
+import os
+import threading
+import requests
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import EmptyPoolError
+from urllib3.util.retry import Retry
+from . import Tracing
+
+# Meshy API root, MESHY_API_BASE points the add-on at another server (the
+# benchmark mock server, a staging deployment)
+API_BASE = os.environ.get("MESHY_API_BASE", "https://api.meshy.ai").rstrip("/")
+
+# Hosts kept in the pool (api, assets cdn, ...) and connections kept per host
+POOL_HOSTS = 4
+POOL_SIZE_PER_HOST = 8
+# Seconds a request waits for a free connection before it fails
+POOL_TIMEOUT = 10
+# (connect, read) in seconds, used when the caller does not pass a timeout
+DEFAULT_TIMEOUT = (5, 30)
+RETRY_STATUS = (429, 500, 502, 503, 504)
+# Session names. Uploads and batch submits go through BULK_POOL, whose
+# connections are not shared with searches, polls and single submits.
+API_POOL = "api"
+BULK_POOL = "bulk"
+
+_stats_lock = threading.Lock()
+_stats = {"requests": 0, "misses": 0, "retries": 0}
+_sessions = {}
+_session_lock = threading.Lock()
+# Set by set_api_key() when running without the add-on preferences
+_api_key = None
+
+
+def _count(key, amount=1):
+    with _stats_lock:
+        _stats[key] += amount
+
+
+# Connection pools that count reused (hit) and newly opened (miss) sockets
+class _CountingPoolMixin:
+    def _get_conn(self, timeout=None):
+        if timeout is None:
+            timeout = POOL_TIMEOUT
+        conn = super()._get_conn(timeout=timeout)
+        _count("requests")
+        # Dropped or brand-new connections have no socket and must handshake
+        if getattr(conn, "sock", None) is None:
+            _count("misses")
+        return conn
+
+
+class _CountingHTTPConnectionPool(_CountingPoolMixin, HTTPConnectionPool):
+    pass
+
+
+class _CountingHTTPSConnectionPool(_CountingPoolMixin, HTTPSConnectionPool):
+    pass
+
+
+class _CountingRetry(Retry):
+    def increment(self, *args, **kwargs):
+        _count("retries")
+        return super().increment(*args, **kwargs)
+
+
+class _MeshyAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CountingHTTPConnectionPool,
+            "https": _CountingHTTPSConnectionPool,
+        }
+
+    def send(self, request, timeout=None, **kwargs):
+        if timeout is None:
+            timeout = DEFAULT_TIMEOUT
+        try:
+            return super().send(request, timeout=timeout, **kwargs)
+        except EmptyPoolError as e:
+            # requests lets this one through as a bare urllib3 error
+            raise requests.ConnectionError(e, request=request) from e
+
+
+# A blocking pool waits up to POOL_TIMEOUT for one of its connections, a
+# non-blocking one opens extra connections and closes them after use
+def _make_session(block=True):
+    # Read and status errors are only retried for idempotent methods so a
+    # submit is never sent twice, connection errors are always safe to retry.
+    retry = _CountingRetry(
+        total=3,
+        connect=3,
+        read=2,
+        status=3,
+        backoff_factor=0.5,
+        status_forcelist=RETRY_STATUS,
+        allowed_methods=frozenset(["GET", "HEAD", "DELETE", "OPTIONS"]),
+        raise_on_status=False,
+    )
+    adapter = _MeshyAdapter(
+        pool_connections=POOL_HOSTS,
+        pool_maxsize=POOL_SIZE_PER_HOST,
+        pool_block=block,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session(pool=API_POOL):
+    with _session_lock:
+        if pool not in _sessions:
+            # Bulk callers bound their own concurrency, so they never wait
+            _sessions[pool] = _make_session(block=pool != BULK_POOL)
+        return _sessions[pool]
+
+
+def set_api_key(key):
+    global _api_key
+    _api_key = key
+
+
+def auth_headers():
+    key = _api_key
+    if key is None:
+        # Only the add-on preferences need Blender
+        from .Utils import get_api_key
+
+        key = get_api_key()
+    return {"Authorization": f"Bearer {key}"}
+
+
+# Send a request through the shared pool, auth=True adds the Meshy API key
+def request(method, url, auth=False, headers=None, pool=API_POOL, **kwargs):
+    if auth:
+        headers = {**auth_headers(), **(headers or {})}
+    with Tracing.span(f"http.{method.lower()}", host=urlsplit(url).netloc) as args:
+        response = get_session(pool).request(method, url, headers=headers, **kwargs)
+        args["status"] = response.status_code
+    Tracing.count(f"http.status_{response.status_code}")
+    return response
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
+
+
+def delete(url, **kwargs):
+    return request("DELETE", url, **kwargs)
+
+
+def pool_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["hits"] = stats["requests"] - stats["misses"]
+    return stats
+
+
+def close():
+    with _session_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
@@ -0,0 +1,223 @@
+import bpy
+import hashlib
+import os
+from bpy.app.handlers import persistent
+from bpy.types import Operator
+from . import Tracing
+
+# Custom properties on images: hash of the original content, and where the
+# full-resolution original of a downscaled image is kept
+DIGEST_PROP = "meshy_sha1"
+ORIGINAL_PROP = "meshy_original"
+TEXTURES_DIR_NAME = "meshy_textures"
+FILE_EXTENSIONS = {"PNG": ".png", "JPEG": ".jpg", "WEBP": ".webp"}
+# Whether any image has ORIGINAL_PROP, None until the images are looked at
+has_downscaled = None
+
+MAX_TEXTURE_SIZES = [
+    ("0", "Full", "Keep imported textures at their full resolution"),
+    ("512", "512", "Downscale imported textures to at most 512 pixels"),
+    ("1024", "1024", "Downscale imported textures to at most 1024 pixels"),
+    ("2048", "2048", "Downscale imported textures to at most 2048 pixels"),
+]
+
+
+# Import a GLB and return the objects it created. Its images are then
+# deduplicated against images already loaded and optionally downscaled,
+# settings default to the scene's import options.
+def import_glb(filepath, dedupe=None, max_texture_size=None):
+    scene = bpy.context.scene
+    if dedupe is None:
+        dedupe = scene.meshy_dedupe_textures
+    if max_texture_size is None:
+        max_texture_size = int(scene.meshy_max_texture_size)
+
+    objects_before = set(bpy.data.objects)
+    images_before = set(bpy.data.images)
+    with Tracing.span("import.gltf", size=os.path.getsize(filepath)):
+        bpy.ops.import_scene.gltf(filepath=filepath)
+    images = [image for image in bpy.data.images if image not in images_before]
+    if dedupe:
+        images = deduplicate_images(images)
+    if max_texture_size:
+        downscale_images(images, max_texture_size)
+    return [obj for obj in bpy.data.objects if obj not in objects_before]
+
+
+def _image_bytes(image):
+    if image.packed_file is not None:
+        return image.packed_file.data
+    path = bpy.path.abspath(image.filepath)
+    if image.filepath and os.path.isfile(path):
+        with open(path, "rb") as f:
+            return f.read()
+    return None
+
+
+def image_digest(image):
+    digest = image.get(DIGEST_PROP)
+    if digest:
+        return digest
+    data = _image_bytes(image)
+    if data is None:
+        return None
+    digest = hashlib.sha1(data).hexdigest()
+    image[DIGEST_PROP] = digest
+    return digest
+
+
+# Remap new images whose content is already loaded onto the loaded image.
+# Only images hashed by an earlier import are compared against, so other
+# images of the file are never read. Returns the images that were kept.
+def deduplicate_images(images):
+    new_images = set(images)
+    known = {}
+    for image in bpy.data.images:
+        if image not in new_images and image.get(DIGEST_PROP):
+            known.setdefault(image[DIGEST_PROP], image)
+
+    kept = []
+    for image in images:
+        digest = image_digest(image)
+        existing = known.get(digest) if digest else None
+        if existing is not None:
+            image.user_remap(existing)
+            bpy.data.images.remove(image)
+        else:
+            if digest:
+                known[digest] = image
+            kept.append(image)
+    return kept
+
+
+def textures_dir():
+    return bpy.utils.user_resource("SCRIPTS", path=TEXTURES_DIR_NAME, create=True)
+
+
+# Write the original content of an image to disk, returns its path
+def keep_original(image):
+    digest = image_digest(image)
+    data = _image_bytes(image)
+    if digest is None or data is None:
+        return None
+    extension = FILE_EXTENSIONS.get(image.file_format, ".png")
+    path = os.path.join(textures_dir(), digest + extension)
+    if not os.path.isfile(path):
+        with open(path, "wb") as f:
+            f.write(data)
+    return path
+
+
+# Shrink images larger than max_size for viewport work, the originals stay
+# on disk and RestoreFullResTextures brings them back for final renders
+def downscale_images(images, max_size):
+    global has_downscaled
+    for image in images:
+        width, height = image.size
+        if max(width, height) <= max_size:
+            continue
+        original = keep_original(image)
+        if original is None:
+            continue
+        factor = max_size / max(width, height)
+        image.scale(max(1, round(width * factor)), max(1, round(height * factor)))
+        image.pack()
+        image[ORIGINAL_PROP] = original
+        has_downscaled = True
+
+
+class RestoreFullResTextures(Operator):
+    bl_idname = "meshy.restore_textures"
+    bl_label = "Restore Full-Res Textures"
+    bl_description = "Reload downscaled Meshy textures from their originals"
+
+    def execute(self, context):
+        global has_downscaled
+        restored = 0
+        for image in bpy.data.images:
+            path = image.get(ORIGINAL_PROP)
+            if not path or not os.path.isfile(path):
+                continue
+            if image.packed_file is not None:
+                image.unpack(method="REMOVE")
+            image.filepath = path
+            image.reload()
+            del image[ORIGINAL_PROP]
+            restored += 1
+        # Originals that are gone leave their images downscaled
+        has_downscaled = None
+        self.report({"INFO"}, f"Restored {restored} textures.")
+        return {"FINISHED"}
+
+
+# Give target the mesh (and so the materials) of the first imported mesh
+# object, then delete what was imported. Keeps target's name, transform,
+# parenting and modifiers.
+def replace_object_data(target, imported):
+    meshes = [obj for obj in imported if obj.type == "MESH"]
+    if not meshes:
+        return False
+    old_data = target.data
+    target.data = meshes[0].data
+    for obj in imported:
+        bpy.data.objects.remove(obj, do_unlink=True)
+    if old_data is not None and old_data.users == 0:
+        bpy.data.meshes.remove(old_data)
+    return True
+
+
+# Another file or an undo step may hold other images, looked at on next use
+@persistent
+def invalidate_downscaled(*args):
+    global has_downscaled
+    has_downscaled = None
+
+
+def downscaled_images_exist():
+    global has_downscaled
+    if has_downscaled is None:
+        has_downscaled = any(image.get(ORIGINAL_PROP) for image in bpy.data.images)
+    return has_downscaled
+
+
+DOWNSCALE_HANDLERS = (
+    bpy.app.handlers.load_post,
+    bpy.app.handlers.undo_post,
+    bpy.app.handlers.redo_post,
+)
+
+
+# Import options shared by the Asset Browser and both task lists
+def draw_import_options(layout, scene):
+    layout.prop(scene, "meshy_use_library")
+    row = layout.row()
+    row.prop(scene, "meshy_dedupe_textures")
+    row.prop(scene, "meshy_max_texture_size", text="Max")
+    if downscaled_images_exist():
+        layout.operator(RestoreFullResTextures.bl_idname, icon="IMAGE_DATA")
+
+
+def register():
+    bpy.utils.register_class(RestoreFullResTextures)
+    for handlers in DOWNSCALE_HANDLERS:
+        handlers.append(invalidate_downscaled)
+    bpy.types.Scene.meshy_dedupe_textures = bpy.props.BoolProperty(
+        name="Share Textures",
+        description="Reuse already loaded images with identical content",
+        default=True,
+    )
+    bpy.types.Scene.meshy_max_texture_size = bpy.props.EnumProperty(
+        name="Max Texture Size",
+        items=MAX_TEXTURE_SIZES,
+        description="Downscale imported textures for viewport and layout work",
+        default="0",
+    )
+
+
+def unregister():
+    del bpy.types.Scene.meshy_max_texture_size
+    del bpy.types.Scene.meshy_dedupe_textures
+    for handlers in DOWNSCALE_HANDLERS:
+        if invalidate_downscaled in handlers:
+            handlers.remove(invalidate_downscaled)
+    bpy.utils.unregister_class(RestoreFullResTextures)
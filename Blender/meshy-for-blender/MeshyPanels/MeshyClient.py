@@ -0,0 +1,89 @@
+import time
+from . import HttpClient
+from .TaskStore import ACTIVE_STATUSES, fetch_task
+from .Upload import upload_file
+
+# Meshy API calls without any Blender UI: the panels and the headless command
+# line both go through these. headers=None uses the configured API key.
+T2M_URL = HttpClient.API_BASE + "/v2/text-to-3d"
+T2T_URL = HttpClient.API_BASE + "/v1/text-to-texture"
+SHOWCASE_URL = HttpClient.API_BASE + "/public/showcases"
+
+# Polling while waiting for a task, grows from the first to the last
+WAIT_MIN_INTERVAL = 2.0
+WAIT_MAX_INTERVAL = 30.0
+WAIT_BACKOFF = 1.5
+
+
+class TaskFailed(Exception):
+    pass
+
+
+def _headers(headers):
+    return HttpClient.auth_headers() if headers is None else headers
+
+
+def preview_payload(prompt, art_style, negative_prompt, name, seed=""):
+    payload = {
+        "mode": "preview",
+        "prompt": prompt,
+        "art_style": art_style,
+        "negative_prompt": negative_prompt,
+        "name": name,
+    }
+    # with seed
+    if seed != "":
+        payload["seed"] = int(seed)
+    return payload
+
+
+def refine_payload(preview_task_id, name):
+    return {"mode": "refine", "preview_task_id": preview_task_id, "name": name}
+
+
+# Create a text to model task, returns its id. Batches pass
+# pool=HttpClient.BULK_POOL.
+def submit_text_to_model(payload, headers=None, pool=HttpClient.API_POOL):
+    response = HttpClient.post(
+        T2M_URL, headers=_headers(headers), json=payload, pool=pool
+    )
+    response.raise_for_status()
+    return response.json()["result"]
+
+
+# Upload a GLB to texture, returns the id of the new text to texture task
+def submit_text_to_texture(fields, file_name, filepath, headers=None, progress=None):
+    response = upload_file(
+        T2T_URL, fields, "model_file", file_name, filepath, _headers(headers), progress
+    )
+    return response.json()["result"]
+
+
+def get_task(base_url, task_id, headers=None):
+    return fetch_task(base_url, task_id, _headers(headers))
+
+
+def delete_task(base_url, task_id, headers=None):
+    response = HttpClient.delete(f"{base_url}/{task_id}", headers=_headers(headers))
+    response.raise_for_status()
+    return response
+
+
+# Poll a task until it is no longer pending or running. Raises TaskFailed
+# for tasks that did not succeed and TimeoutError after timeout seconds.
+def wait_for_task(base_url, task_id, headers=None, timeout=None, on_update=None):
+    headers = _headers(headers)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    interval = WAIT_MIN_INTERVAL
+    while True:
+        task = fetch_task(base_url, task_id, headers)
+        if on_update is not None:
+            on_update(task)
+        if task["status"] not in ACTIVE_STATUSES:
+            if task["status"] != "SUCCEEDED":
+                raise TaskFailed(f"Task {task_id} ended as {task['status']}")
+            return task
+        if deadline is not None and time.monotonic() + interval > deadline:
+            raise TimeoutError(f"Task {task_id} still {task['status']}")
+        time.sleep(interval)
+        interval = min(interval * WAIT_BACKOFF, WAIT_MAX_INTERVAL)
@@ -0,0 +1,127 @@
+from . import AssetLibrary
+from .Cache import get_model_cache, get_thumbnail_cache
+from .Dispatch import dispatcher
+from .Download import DownloadCancelled, start_progress
+from .Utils import redraw_panels
+
+
+# Mixin for operators that download a model and import it. Invoked from the
+# UI the download runs on the transfer pool while a modal timer watches
+# it, only import_result() runs on the main thread. Esc cancels. Called with
+# EXEC_DEFAULT (scripts, background mode) everything runs in execute().
+# With "Import To Library" on, the model is placed as a linked instance of
+# its library asset instead, and placing it again skips the download.
+class ModalDownloadOperator:
+    progress_owner = ""
+    # Set by download_source() when a preview image for the library exists
+    thumbnail_url = ""
+
+    # Subclasses return (model_id, url, display name) or None
+    def download_source(self, context):
+        raise NotImplementedError
+
+    def import_result(self, context, filepath):
+        raise NotImplementedError
+
+    def use_library(self, context):
+        return context.scene.meshy_use_library
+
+    def execute(self, context):
+        if not self._start(context):
+            return {"CANCELLED"}
+        if self._library_key and AssetLibrary.has_asset(self._library_key):
+            return self._place(context)
+        self._download()
+        self._progress.finish(error="failed" if self._error else "")
+        if self._error:
+            self.report({"ERROR"}, f"Failed to download model {self._name}.")
+            print(self._error)
+            return {"CANCELLED"}
+        return self._import(context)
+
+    def invoke(self, context, event):
+        if not self._start(context):
+            return {"CANCELLED"}
+        if self._library_key and AssetLibrary.has_asset(self._library_key):
+            return self._place(context)
+        self._future = dispatcher.submit_transfer(self._download)
+
+        wm = context.window_manager
+        self._timer = wm.event_timer_add(0.2, window=context.window)
+        wm.modal_handler_add(self)
+        return {"RUNNING_MODAL"}
+
+    def _start(self, context):
+        source = self.download_source(context)
+        if source is None:
+            return False
+        self._model_id, self._url, self._name = source
+        self._library_key = ""
+        if self.use_library(context):
+            self._library_key = AssetLibrary.asset_key(self._model_id, self._url)
+        self._filepath = None
+        self._thumbnail_path = None
+        self._error = ""
+        self._progress = start_progress(self._name, self.progress_owner)
+        return True
+
+    def _download(self):
+        try:
+            self._filepath = get_model_cache().fetch(
+                self._model_id, self._url, self._progress
+            )
+            if self._library_key and self.thumbnail_url:
+                self._thumbnail_path = get_thumbnail_cache().fetch(
+                    self._model_id, self.thumbnail_url
+                )
+        except DownloadCancelled:
+            self._error = "cancelled"
+        except Exception as e:
+            self._error = str(e)
+
+    def _import(self, context):
+        if self._library_key:
+            return self._place(context)
+        return self.import_result(context, self._filepath)
+
+    def _place(self, context):
+        self._progress.finish()
+        AssetLibrary.place_instance(
+            context,
+            self._library_key,
+            self._name,
+            self._filepath,
+            self._thumbnail_path,
+        )
+        self.report({"INFO"}, f"Placed {self._name} from the asset library.")
+        return {"FINISHED"}
+
+    def modal(self, context, event):
+        if event.type == "ESC" and event.value == "PRESS":
+            self._progress.cancel()
+            self._finish(context, "cancelled")
+            self.report({"WARNING"}, f"Download of {self._name} cancelled.")
+            return {"CANCELLED"}
+
+        if event.type != "TIMER":
+            return {"PASS_THROUGH"}
+
+        if not self._future.done():
+            context.workspace.status_text_set(
+                f"Downloading {self._name}: {self._progress.text()}  (Esc to cancel)"
+            )
+            redraw_panels()
+            return {"PASS_THROUGH"}
+
+        self._finish(context, "failed" if self._error else "")
+        if self._error:
+            self.report({"ERROR"}, f"Failed to download model {self._name}.")
+            print(self._error)
+            return {"CANCELLED"}
+        return self._import(context)
+
+    def _finish(self, context, error):
+        context.window_manager.event_timer_remove(self._timer)
+        context.workspace.status_text_set(None)
+        self._progress.finish(error=error)
+        redraw_panels()
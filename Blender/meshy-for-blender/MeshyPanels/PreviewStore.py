@@ -0,0 +1,111 @@
+import bpy
+import bpy.utils.previews
+import os
+from collections import OrderedDict
+from . import Tracing
+from .Cache import get_thumbnail_cache
+
+# Icons kept loaded at most, about four result pages
+MAX_ICONS = 96
+# Edge length thumbnails are decoded and stored at
+ICON_SIZE = 256
+
+
+# The Asset Browser's preview icons in a single collection. Icons are
+# loaded from icon-sized copies of the thumbnails and released least
+# recently used first once more than max_icons are loaded, except those of
+# the page on screen.
+class PreviewStore:
+    def __init__(self, max_icons=MAX_ICONS):
+        self.max_icons = max_icons
+        self._collection = None
+        self._used = OrderedDict()
+        self._visible = set()
+
+    def _previews(self):
+        if self._collection is None:
+            self._collection = bpy.utils.previews.new()
+        return self._collection
+
+    def __len__(self):
+        return len(self._used)
+
+    def __contains__(self, key):
+        return key in self._used
+
+    # The icon of key or 0 when it is not loaded
+    def icon_id(self, key):
+        if key not in self._used:
+            return 0
+        self._used.move_to_end(key)
+        return self._previews()[key].icon_id
+
+    # The keys of the page on screen, they are never evicted
+    def set_visible(self, keys):
+        self._visible = set(keys)
+        self._evict()
+
+    def show(self, key, thumbnail_path):
+        if key in self._used:
+            self._used.move_to_end(key)
+            return
+        previews = self._previews()
+        previews.load(key, icon_file(thumbnail_path), "IMAGE")
+        self._used[key] = True
+        Tracing.count("previews.loaded")
+        self._evict()
+
+    def _evict(self):
+        if len(self._used) <= self.max_icons:
+            return
+        previews = self._previews()
+        for key in list(self._used):
+            if len(self._used) <= self.max_icons:
+                break
+            if key in self._visible:
+                continue
+            del self._used[key]
+            # Releases the image of this one icon
+            del previews[key]
+            Tracing.count("previews.evicted")
+
+    def close(self):
+        if self._collection is not None:
+            bpy.utils.previews.remove(self._collection)
+            self._collection = None
+        self._used.clear()
+        self._visible = set()
+
+
+# An ICON_SIZE copy of a downloaded thumbnail, made once and kept in the
+# thumbnail cache. Main thread only. Falls back to the thumbnail itself.
+def icon_file(thumbnail_path):
+    cache = get_thumbnail_cache()
+    file_name = os.path.splitext(os.path.basename(thumbnail_path))[0] + ".icon.png"
+    key = f"icon:{file_name}"
+    entry = cache.get(key)
+    if entry is not None:
+        return cache.path_of(entry)
+
+    tmp_path = cache.temp_path(file_name)
+    image = None
+    try:
+        with Tracing.span("previews.decode"):
+            image = bpy.data.images.load(thumbnail_path, check_existing=False)
+            width, height = image.size
+            if max(width, height) <= ICON_SIZE:
+                return thumbnail_path
+            scale = ICON_SIZE / max(width, height)
+            image.scale(max(1, round(width * scale)), max(1, round(height * scale)))
+            image.filepath_raw = tmp_path
+            image.file_format = "PNG"
+            image.save()
+        return cache.path_of(cache.put(key, tmp_path, file_name))
+    except Exception as e:
+        print(f"Failed to make an icon of {thumbnail_path}: {e}")
+        return thumbnail_path
+    finally:
+        if image is not None:
+            bpy.data.images.remove(image)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
@@ -0,0 +1,192 @@
+import bpy
+from array import array
+from mathutils import Matrix, Vector
+from .Cache import get_model_cache, get_thumbnail_cache
+from .Dispatch import dispatcher, redraw_while
+from .Download import DownloadCancelled, start_progress
+from .ImportPipeline import import_glb, replace_object_data
+
+# Proxies still waiting for their full-resolution mesh carry this property
+PENDING_PROP = "meshy_pending_model"
+PROXY_SIZE = 1.0
+
+
+# Move the mesh so its bounding box is centered on the object origin, what
+# origin_set(type="ORIGIN_GEOMETRY") does for a freshly imported model
+def center_mesh(mesh):
+    if not mesh.vertices:
+        return
+    # One bulk copy of the coordinates, min and max then run in C
+    co = array("f", [0.0]) * (len(mesh.vertices) * 3)
+    mesh.vertices.foreach_get("co", co)
+    center = Vector([(min(co[i::3]) + max(co[i::3])) / 2 for i in range(3)])
+    mesh.transform(Matrix.Translation(-center))
+
+
+def _box_mesh(name, size=PROXY_SIZE):
+    half = size / 2
+    vertices = [
+        (x * half, y * half, z * half)
+        for x in (-1, 1)
+        for y in (-1, 1)
+        for z in (-1, 1)
+    ]
+    faces = [
+        (0, 1, 3, 2),
+        (4, 6, 7, 5),
+        (0, 4, 5, 1),
+        (2, 3, 7, 6),
+        (0, 2, 6, 4),
+        (1, 5, 7, 3),
+    ]
+    mesh = bpy.data.meshes.new(name)
+    mesh.from_pydata(vertices, [], faces)
+    mesh.update()
+    return mesh
+
+
+# Show the thumbnail on the proxy box so it can be told apart from others
+def apply_thumbnail(obj, thumbnail_path):
+    image = bpy.data.images.load(thumbnail_path, check_existing=True)
+    material = bpy.data.materials.new(f"{obj.name}_proxy")
+    material.use_nodes = True
+    nodes = material.node_tree.nodes
+    texture = nodes.new("ShaderNodeTexImage")
+    texture.image = image
+    shader = nodes.get("Principled BSDF")
+    if shader is not None:
+        material.node_tree.links.new(
+            texture.outputs["Color"], shader.inputs["Base Color"]
+        )
+    obj.data.materials.clear()
+    obj.data.materials.append(material)
+
+
+# Create the stand-in object at the 3D cursor: the preview-mode mesh when it
+# is already on disk, a box otherwise. The preview file is not hash-checked
+# here, one that fails to import gives a box as well.
+def place_proxy(context, name, preview_path=None):
+    obj = None
+    imported = []
+    if preview_path:
+        try:
+            imported = import_glb(preview_path)
+        except RuntimeError as e:
+            print(f"Failed to import the preview {preview_path}: {e}")
+    if imported:
+        meshes = [o for o in imported if o.type == "MESH"]
+        if meshes:
+            obj = meshes[0]
+            for other in imported:
+                if other is not obj:
+                    bpy.data.objects.remove(other, do_unlink=True)
+            obj.name = name
+            obj.parent = None
+            obj.matrix_world = Matrix.Identity(4)
+            center_mesh(obj.data)
+    if obj is None:
+        obj = bpy.data.objects.new(name, _box_mesh(f"{name}_proxy"))
+        context.collection.objects.link(obj)
+        obj.display_type = "TEXTURED"
+    obj.location = context.scene.cursor.location
+    for selected in context.selected_objects:
+        selected.select_set(False)
+    obj.select_set(True)
+    context.view_layer.objects.active = obj
+    return obj
+
+
+# Downloads the full model for a proxy on the transfer pool. The
+# thumbnail (given for box proxies) is put on the proxy once it is there and
+# the full mesh is swapped in at the end, keeping whatever transform the
+# proxy has been given in the meantime.
+class ProxySwap:
+    def __init__(self, proxy, model_id, url, thumbnail_url="", owner=""):
+        self.proxy_name = proxy.name
+        self.model_id = model_id
+        self.url = url
+        self.thumbnail_url = thumbnail_url
+        self.filepath = None
+        self.error = ""
+        self.progress = start_progress(proxy.name, owner)
+        proxy[PENDING_PROP] = model_id
+        self._future = None
+
+    def start(self):
+        self._future = dispatcher.submit_transfer(
+            self._download, on_done=self._finished
+        )
+        redraw_while(self._running)
+
+    def _download(self):
+        try:
+            if self.thumbnail_url:
+                try:
+                    thumbnail_path = get_thumbnail_cache().fetch(
+                        self.model_id, self.thumbnail_url
+                    )
+                    if thumbnail_path:
+                        dispatcher.call_soon(self._show_thumbnail, thumbnail_path)
+                except Exception as e:
+                    print(f"Failed to fetch proxy thumbnail: {e}")
+            self.filepath = get_model_cache().fetch(
+                self.model_id, self.url, self.progress
+            )
+        except DownloadCancelled:
+            self.error = "cancelled"
+        except Exception as e:
+            self.error = str(e)
+
+    # The proxy may have been renamed or deleted while downloading
+    def proxy(self):
+        obj = bpy.data.objects.get(self.proxy_name)
+        if obj is not None and obj.get(PENDING_PROP) == self.model_id:
+            return obj
+        for obj in bpy.data.objects:
+            if obj.get(PENDING_PROP) == self.model_id:
+                return obj
+        return None
+
+    # Checked on the main thread while downloading, a deleted proxy cancels
+    def _running(self):
+        if self.proxy() is None:
+            self.progress.cancel()
+        return not self._future.done()
+
+    def _show_thumbnail(self, thumbnail_path):
+        proxy = self.proxy()
+        if proxy is not None:
+            apply_thumbnail(proxy, thumbnail_path)
+
+    def _finished(self, future):
+        self.progress.finish(error="failed" if self.error else "")
+        proxy = self.proxy()
+        if proxy is None:
+            return
+        if self.error:
+            print(f"Failed to download model {self.proxy_name}: {self.error}")
+            return
+        self.swap(proxy)
+
+    def swap(self, proxy):
+        proxy_materials = [m for m in proxy.data.materials if m is not None]
+        selected = bpy.context.selected_objects
+        active = bpy.context.view_layer.objects.active
+        imported = import_glb(self.filepath)
+        if not replace_object_data(proxy, imported):
+            print(f"{self.filepath} has no mesh to replace the proxy with")
+            return
+        center_mesh(proxy.data)
+        del proxy[PENDING_PROP]
+        for material in proxy_materials:
+            if material.users == 0:
+                bpy.data.materials.remove(material)
+        # The import changes the selection, put it back the way it was
+        for obj in bpy.context.selected_objects:
+            obj.select_set(False)
+        for obj in selected:
+            if obj.name in bpy.data.objects:
+                obj.select_set(True)
+        if active is not None and active.name in bpy.data.objects:
+            bpy.context.view_layer.objects.active = active
+        dispatcher.request_redraw()
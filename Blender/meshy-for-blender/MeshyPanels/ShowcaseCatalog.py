@@ -0,0 +1,230 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+CATALOG_FILE = "showcases.sqlite"
+# Stored in PRAGMA user_version, a catalog of another version is rebuilt
+SCHEMA_VERSION = 2
+# Pages fetched from the server more recently than this are replayed from
+# the catalog without asking again
+CATALOG_FRESH_SECONDS = 3600
+
+# The Asset Browser's sortBy values and the columns sorting by them locally
+SORT_COLUMNS = {
+    "-created_at": "created_at",
+    "-public_popularity": "popularity",
+    "-downloads": "downloads",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS showcases (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    author TEXT NOT NULL,
+    created_at REAL,
+    popularity REAL,
+    downloads REAL,
+    seen REAL NOT NULL,
+    data TEXT NOT NULL
+);
+-- Position in the unfiltered server listing of each sort order, used where
+-- the showcase itself carries no date, popularity or download count
+CREATE TABLE IF NOT EXISTS ranks (
+    sort_by TEXT NOT NULL,
+    id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (sort_by, id)
+);
+-- What the server returned for a page: its showcase ids in order (JSON)
+-- and whether it said there are more
+CREATE TABLE IF NOT EXISTS fetched (
+    search TEXT NOT NULL,
+    sort_by TEXT NOT NULL,
+    page_num INTEGER NOT NULL,
+    time REAL NOT NULL,
+    ids TEXT NOT NULL,
+    has_next INTEGER NOT NULL,
+    PRIMARY KEY (search, sort_by, page_num)
+);
+"""
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS showcases_fts
+USING fts5(id UNINDEXED, name, author)
+"""
+
+
+def _first(data, *keys):
+    for key in keys:
+        if data.get(key) is not None:
+            return data[key]
+    return None
+
+
+def _number(value):
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+# Every word of the query as a prefix, "red car" finds "Red Cart"
+def fts_query(search):
+    words = re.findall(r"\w+", search.lower())
+    return " ".join(f'"{word}"*' for word in words)
+
+
+# Showcase metadata of every result page fetched so far, in SQLite next to
+# the thumbnail and model caches. Pages fetched recently are replayed as the
+# server returned them. Offline and when the server cannot be reached the
+# catalog is searched itself, with FTS5 where the sqlite3 build has it and
+# LIKE otherwise.
+class ShowcaseCatalog:
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, CATALOG_FILE)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        # Only a cache, an older layout is dropped instead of migrated
+        if self._db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            for table in ("showcases", "ranks", "fetched", "showcases_fts"):
+                self._db.execute(f"DROP TABLE IF EXISTS {table}")
+            self._db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._db.executescript(SCHEMA)
+        try:
+            self._db.execute(FTS_SCHEMA)
+            self.has_fts = True
+        except sqlite3.OperationalError:
+            self.has_fts = False
+        self._db.commit()
+        self._count = self._count_rows()
+
+    def _count_rows(self):
+        return self._db.execute("SELECT COUNT(*) FROM showcases").fetchone()[0]
+
+    def __len__(self):
+        return self._count
+
+    # Store one result page as the server returned it
+    def add_page(self, results, search, sort_by, page_num, page_size, has_next):
+        now = time.time()
+        rows = [
+            (
+                data["id"],
+                data.get("name") or "",
+                data.get("author") or "",
+                _number(_first(data, "createdAt", "created_at")),
+                _number(_first(data, "publicPopularity", "public_popularity")),
+                _number(_first(data, "downloads", "downloadCount")),
+                now,
+                json.dumps(data),
+            )
+            for data in results
+        ]
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO showcases VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            if self.has_fts:
+                ids = [(row[0],) for row in rows]
+                self._db.executemany("DELETE FROM showcases_fts WHERE id = ?", ids)
+                self._db.executemany(
+                    "INSERT INTO showcases_fts VALUES (?, ?, ?)",
+                    [row[:3] for row in rows],
+                )
+            if not search:
+                start = (page_num - 1) * page_size
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO ranks VALUES (?, ?, ?)",
+                    [(sort_by, row[0], start + i) for i, row in enumerate(rows)],
+                )
+            self._db.execute(
+                "INSERT OR REPLACE INTO fetched VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    search,
+                    sort_by,
+                    page_num,
+                    now,
+                    json.dumps([row[0] for row in rows]),
+                    int(has_next),
+                ),
+            )
+            self._count = self._count_rows()
+
+    # The showcases and has-next flag the server returned for this page, if
+    # it was fetched less than max_age ago, otherwise None
+    def replay(self, search, sort_by, page_num, max_age=CATALOG_FRESH_SECONDS):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT time, ids, has_next FROM fetched"
+                " WHERE search = ? AND sort_by = ? AND page_num = ?",
+                (search, sort_by, page_num),
+            ).fetchone()
+            if row is None or time.time() - row[0] >= max_age:
+                return None
+            ids = json.loads(row[1])
+            data = {}
+            for i in range(0, len(ids), 500):
+                chunk = ids[i : i + 500]
+                marks = ", ".join("?" * len(chunk))
+                data.update(
+                    self._db.execute(
+                        f"SELECT id, data FROM showcases WHERE id IN ({marks})", chunk
+                    ).fetchall()
+                )
+        if any(showcase_id not in data for showcase_id in ids):
+            return None
+        return [json.loads(data[i]) for i in ids], bool(row[2])
+
+    # One page of matching showcases ranked locally, and whether there are
+    # more. Close to the server's order, not the same set of results.
+    def search(self, search, sort_by, page_num, page_size):
+        column = SORT_COLUMNS.get(sort_by, "created_at")
+        query = (
+            "SELECT s.data FROM showcases s"
+            " LEFT JOIN ranks r ON r.id = s.id AND r.sort_by = ?"
+        )
+        params = [sort_by]
+        match = fts_query(search)
+        if match and self.has_fts:
+            query += (
+                " WHERE s.id IN"
+                " (SELECT id FROM showcases_fts WHERE showcases_fts MATCH ?)"
+            )
+            params.append(match)
+        elif search.strip():
+            query += " WHERE s.name LIKE ? OR s.author LIKE ?"
+            params += [f"%{search.strip()}%"] * 2
+        query += (
+            f" ORDER BY s.{column} IS NULL, s.{column} DESC,"
+            " r.position IS NULL, r.position, s.seen DESC"
+            " LIMIT ? OFFSET ?"
+        )
+        # One extra row tells whether a next page exists
+        params += [page_size + 1, (page_num - 1) * page_size]
+        with self._lock:
+            rows = self._db.execute(query, params).fetchall()
+        results = [json.loads(row[0]) for row in rows[:page_size]]
+        return results, len(rows) > page_size
+
+    def clear(self):
+        with self._lock, self._db:
+            for table in ("showcases", "ranks", "fetched"):
+                self._db.execute(f"DELETE FROM {table}")
+            if self.has_fts:
+                self._db.execute("DELETE FROM showcases_fts")
+            self._count = 0
+
+    # Writes are committed as they happen, flushing only has to exist for
+    # flush_caches()
+    def flush(self):
+        pass
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,128 @@
+import threading
+import time
+from . import HttpClient
+from .Dispatch import dispatcher
+from .TaskStore import fetch_task
+
+# Seconds between two polls of one task, grows while its progress stalls
+MIN_INTERVAL = 2.0
+MAX_INTERVAL = 30.0
+BACKOFF = 1.5
+# Seconds between two main-thread ticks refreshing the watched tasks
+TICK_INTERVAL = 1.0
+
+
+# Polls unfinished tasks one by one on a background thread. Every answer is
+# merged into the task store on the main thread through the dispatcher,
+# which also runs a periodic tick handing the thread the ids to watch. The
+# panels are redrawn only when the store changed.
+class TaskPoller:
+    def __init__(self, base_url, store):
+        self.base_url = base_url
+        self.store = store
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._watched = {}
+        self._updates = []
+        self._headers = {}
+        self._thread = None
+        self._seen_version = 0
+        # Ticks of an earlier start() stop rescheduling themselves
+        self._session = 0
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._session += 1
+        dispatcher.call_soon(self.tick, self._session)
+
+    def stop(self):
+        self._session += 1
+        self._stop.set()
+        self._wake.set()
+
+    # Main thread: merge finished polls, redraw if the store changed
+    def apply(self):
+        with self._lock:
+            updates, self._updates = self._updates, []
+        # Deleted tasks are not brought back by a late answer
+        updates = [task for task in updates if self.store.get(task["id"])]
+        self.store.merge(updates)
+        # Covers both polled tasks and pages merged by a running sync
+        if self.store.version != self._seen_version:
+            self._seen_version = self.store.version
+            dispatcher.request_redraw()
+
+    # Main thread, every TICK_INTERVAL: refresh the set of watched tasks
+    def tick(self, session):
+        if session != self._session:
+            return
+        self.apply()
+        active = {task["id"]: task for task in self.store.active()}
+        if active:
+            self.watch(active, HttpClient.auth_headers())
+        else:
+            self.watch({}, {})
+        dispatcher.call_later(TICK_INTERVAL, self.tick, session)
+
+    def watch(self, active, headers):
+        now = time.time()
+        with self._lock:
+            self._headers = headers
+            for task_id in list(self._watched):
+                if task_id not in active:
+                    del self._watched[task_id]
+            added = False
+            for task_id, task in active.items():
+                if task_id not in self._watched:
+                    self._watched[task_id] = {
+                        "interval": MIN_INTERVAL,
+                        "due": now + MIN_INTERVAL,
+                        "state": (task.get("status"), task.get("progress")),
+                    }
+                    added = True
+        if added:
+            self._wake.set()
+
+    def _next_due(self):
+        with self._lock:
+            if not self._watched:
+                return None, None
+            task_id = min(self._watched, key=lambda i: self._watched[i]["due"])
+            return task_id, self._watched[task_id]["due"]
+
+    def _run(self):
+        while not self._stop.is_set():
+            task_id, due = self._next_due()
+            wait = None if task_id is None else due - time.time()
+            if wait is None or wait > 0:
+                self._wake.wait(wait)
+                self._wake.clear()
+                continue
+            self._poll(task_id)
+
+    def _poll(self, task_id):
+        try:
+            task = fetch_task(self.base_url, task_id, self._headers)
+        except Exception as e:
+            print(f"Failed to poll task {task_id}: {e}")
+            task = None
+
+        with self._lock:
+            watched = self._watched.get(task_id)
+            if watched is None:
+                return
+            state = None
+            if task is not None:
+                state = (task.get("status"), task.get("progress"))
+                self._updates.append(task)
+                dispatcher.call_soon(self.apply)
+            # Poll fast while the task moves, back off while it sits still
+            if state is not None and state != watched["state"]:
+                watched["interval"] = MIN_INTERVAL
+                watched["state"] = state
+            else:
+                watched["interval"] = min(watched["interval"] * BACKOFF, MAX_INTERVAL)
+            watched["due"] = time.time() + watched["interval"]
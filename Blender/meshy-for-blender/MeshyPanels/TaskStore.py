@@ -0,0 +1,147 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from . import HttpClient
+
+ACTIVE_STATUSES = ("PENDING", "IN_PROGRESS")
+PAGE_SIZE = 50
+# Unfinished tasks fetched at the same time after the new pages, a few so
+# searches and polls still find free connections
+REFRESH_WORKERS = 4
+
+
+# Tasks indexed by id, newest first. Safe to update from any thread, the
+# panels read the list snapshot returned by tasks().
+class TaskStore:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_id = {}
+        self._snapshot = []
+        self.version = 0
+        # Set once every page of the account has been fetched
+        self.complete = False
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def tasks(self):
+        return self._snapshot
+
+    def get(self, task_id):
+        return self._by_id.get(task_id)
+
+    def active(self):
+        return [task for task in self._snapshot if task["status"] in ACTIVE_STATUSES]
+
+    # Insert or update tasks, returns True if anything changed
+    def merge(self, tasks):
+        with self._lock:
+            changed = False
+            for task in tasks:
+                if self._by_id.get(task["id"]) != task:
+                    self._by_id[task["id"]] = task
+                    changed = True
+            if changed:
+                self._rebuild()
+            return changed
+
+    def remove(self, task_id):
+        with self._lock:
+            if self._by_id.pop(task_id, None) is not None:
+                self._rebuild()
+
+    def clear(self):
+        with self._lock:
+            self._by_id.clear()
+            self.complete = False
+            self._rebuild()
+
+    def newest_created_at(self):
+        snapshot = self._snapshot
+        return snapshot[0].get("created_at", 0) if snapshot else 0
+
+    def _rebuild(self):
+        self._snapshot = sorted(
+            self._by_id.values(), key=lambda t: t.get("created_at", 0), reverse=True
+        )
+        self.version += 1
+
+
+def fetch_task(base_url, task_id, headers):
+    response = HttpClient.get(f"{base_url}/{task_id}", headers=headers)
+    response.raise_for_status()
+    return response.json()
+
+
+def fetch_page(base_url, page_num, headers):
+    response = HttpClient.get(
+        base_url,
+        headers=headers,
+        params={"pageNum": page_num, "pageSize": PAGE_SIZE, "sortBy": "-created_at"},
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+# Syncs a TaskStore with the account. The first sync walks every page, later
+# ones only fetch pages until they reach a task the store already has, then
+# refresh the tasks that have not finished yet.
+class TaskSync:
+    def __init__(self, base_url, store, on_done=None):
+        self.base_url = base_url
+        self.store = store
+        # Called on the sync thread when a background sync has finished
+        self.on_done = on_done
+        self.status = ""
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, headers):
+        if self.running:
+            return False
+        self.status = "Refreshing..."
+        self._thread = threading.Thread(target=self._run, args=(headers,), daemon=True)
+        self._thread.start()
+        return True
+
+    def _run(self, headers):
+        try:
+            fetched = self.sync(headers)
+            self.status = f"{len(self.store)} tasks, {fetched} fetched"
+        except Exception as e:
+            print(f"Task list refresh failed: {e}")
+            self.status = "Refresh failed"
+        if self.on_done is not None:
+            self.on_done()
+
+    def sync(self, headers):
+        newest = self.store.newest_created_at() if self.store.complete else None
+        fetched_ids = set()
+        page_num = 1
+        while True:
+            page = fetch_page(self.base_url, page_num, headers)
+            fetched_ids.update(task["id"] for task in page)
+            self.store.merge(page)
+            if newest is not None and any(
+                task.get("created_at", 0) <= newest for task in page
+            ):
+                break
+            if len(page) < PAGE_SIZE:
+                self.store.complete = True
+                break
+            page_num += 1
+
+        # Tasks older than the fetched pages may still be running
+        stale = [t["id"] for t in self.store.active() if t["id"] not in fetched_ids]
+        if stale:
+            with ThreadPoolExecutor(
+                max_workers=REFRESH_WORKERS, thread_name_prefix="meshy-sync"
+            ) as pool:
+                tasks = list(
+                    pool.map(lambda i: fetch_task(self.base_url, i, headers), stale)
+                )
+            self.store.merge(tasks)
+            fetched_ids.update(stale)
+        return len(fetched_ids)
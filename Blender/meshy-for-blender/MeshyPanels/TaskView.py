@@ -0,0 +1,121 @@
+from .TaskStore import ACTIVE_STATUSES
+
+ROWS_PER_PAGE = 20
+
+STATUS_FILTERS = [
+    ("ALL", "All", "Show every task"),
+    ("ACTIVE", "Running", "Pending and in progress tasks"),
+    ("SUCCEEDED", "Succeeded", "Finished tasks"),
+    ("FAILED", "Failed", "Failed and expired tasks"),
+]
+SORT_ORDERS = [
+    ("NEWEST", "Newest", "Newest tasks first"),
+    ("OLDEST", "Oldest", "Oldest tasks first"),
+    ("NAME", "Name", "By task name"),
+]
+
+
+def _status_matches(status, wanted):
+    if wanted == "ALL":
+        return True
+    if wanted == "ACTIVE":
+        return status in ACTIVE_STATUSES
+    if wanted == "FAILED":
+        return status not in ACTIVE_STATUSES and status != "SUCCEEDED"
+    return status == wanted
+
+
+# What a panel row shows for a task, computed once per rebuild instead of on
+# every redraw
+class TaskRow:
+    __slots__ = (
+        "task",
+        "id",
+        "name",
+        "art_style",
+        "mode",
+        "status",
+        "status_text",
+        "progress_text",
+        "succeeded",
+        "glb_url",
+        "thumbnail_url",
+    )
+
+    def __init__(self, task):
+        self.task = task
+        self.id = task["id"]
+        self.name = task.get("name") or self.id
+        self.art_style = task.get("art_style", "")
+        self.mode = task.get("mode", "")
+        self.status = task["status"]
+        self.status_text = f"Status {self.status}"
+        self.progress_text = ""
+        if self.status == "IN_PROGRESS":
+            self.progress_text = f"Progress {task.get('progress', 0)}"
+        self.succeeded = self.status == "SUCCEEDED"
+        self.glb_url = (task.get("model_urls") or {}).get("glb", "")
+        self.thumbnail_url = task.get("thumbnail_url", "")
+
+
+# Filtered, sorted rows of a TaskStore. The rows are rebuilt only when the
+# store or the filters change, drawing just slices out the visible page.
+class TaskView:
+    def __init__(self, store):
+        self.store = store
+        self._key = None
+        self._rows = []
+
+    def rows(self, status="ALL", search="", sort="NEWEST"):
+        search = search.strip().lower()
+        key = (self.store.version, status, search, sort)
+        if key != self._key:
+            self._rows = self._build(status, search, sort)
+            self._key = key
+        return self._rows
+
+    def _build(self, status, search, sort):
+        tasks = self.store.tasks()
+        rows = [
+            TaskRow(task)
+            for task in tasks
+            if _status_matches(task["status"], status)
+            and (not search or search in (task.get("name") or "").lower())
+        ]
+        # The store is already newest first
+        if sort == "OLDEST":
+            rows.reverse()
+        elif sort == "NAME":
+            rows.sort(key=lambda row: row.name.lower())
+        return rows
+
+    # The rows of one page (1-based, clamped) and the number of pages
+    def page(self, page, status="ALL", search="", sort="NEWEST", size=ROWS_PER_PAGE):
+        rows = self.rows(status, search, sort)
+        pages = max(1, -(-len(rows) // size))
+        page = min(max(page, 1), pages)
+        start = (page - 1) * size
+        return rows[start : start + size], page, pages, len(rows)
+
+
+# Filter and sort controls for the task list properties named <prefix>_*
+def draw_task_filters(layout, scene, prefix):
+    row = layout.row(align=True)
+    row.prop(scene, f"{prefix}_filter_status", text="")
+    row.prop(scene, f"{prefix}_sort", text="")
+    layout.prop(scene, f"{prefix}_filter_name", text="", icon="VIEWZOOM")
+
+
+def draw_pager(layout, scene, prefix, page, pages, count):
+    row = layout.row(align=True)
+    row.label(text=f"{count} tasks, page {page} of {pages}")
+    if pages > 1:
+        row.prop(scene, f"{prefix}_page", text="")
+
+
+# Update callback for the filter properties, a new filter starts on page 1
+def reset_page(prefix):
+    def update(self, context):
+        setattr(self, f"{prefix}_page", 1)
+
+    return update
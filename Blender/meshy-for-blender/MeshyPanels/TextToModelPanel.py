@@ -1,12 +1,35 @@
-import json
 import bpy
-import tempfile
-from .Utils import get_api_key
-import requests
-import os
+from . import HttpClient
+from . import Tracing
+from .TaskPoller import TaskPoller
+from .TaskStore import TaskStore, TaskSync
+from .TaskView import (
+    SORT_ORDERS,
+    STATUS_FILTERS,
+    TaskView,
+    draw_pager,
+    draw_task_filters,
+    reset_page,
+)
+from .Download import draw_downloads
+from .ModalDownload import ModalDownloadOperator
+from .ImportPipeline import draw_import_options, import_glb
+from .Cache import get_model_cache
+from .ProgressiveImport import ProxySwap, place_proxy
+from .BatchSubmit import BatchJob, read_batch_file
+from .Dispatch import redraw_soon, redraw_while
+from .MeshyClient import (
+    T2M_URL,
+    delete_task,
+    preview_payload,
+    refine_payload,
+    submit_text_to_model,
+)
 
-T2M_URL = "https://api.meshy.ai/v2/text-to-3d"
-taskList = []
+taskStore = TaskStore()
+taskSync = TaskSync(T2M_URL, taskStore, on_done=redraw_soon)
+taskView = TaskView(taskStore)
+batchJob = None
 
 
 # Submit task
@@ -20,67 +43,141 @@ class SendSubmitRequest(bpy.types.Operator):
             return {"FINISHED"}
 
         # create preview task
-        payload = {
-            "mode": "preview",
-            "prompt": context.scene.t2m_prompt,
-            "art_style": context.scene.t2m_art_style,
-            "negative_prompt": context.scene.t2m_negative_prompt,
-            "name": context.scene.t2m_task_name,
-        }
-        # with seed
-        if context.scene.t2m_seed != "":
-            payload["seed"] = int(context.scene.t2m_seed)
-        headers = {"Authorization": f"Bearer {get_api_key()}"}
-        response = requests.post(
-            T2M_URL,
-            headers=headers,
-            json=payload,
+        payload = preview_payload(
+            context.scene.t2m_prompt,
+            context.scene.t2m_art_style,
+            context.scene.t2m_negative_prompt,
+            context.scene.t2m_task_name,
+            context.scene.t2m_seed,
         )
-        response.raise_for_status()
-        self.report({"INFO"}, response.text)
+        taskId = submit_text_to_model(payload)
+        self.report({"INFO"}, f"Task {taskId} submitted.")
+        return {"FINISHED"}
+
+
+# Submit one preview task per row of a CSV/JSON file
+class BatchSubmitRequest(bpy.types.Operator):
+    bl_label = "Batch Submit"
+    bl_idname = "meshy.t2m_batch_submit"
+
+    def execute(self, context):
+        global batchJob
+        if batchJob is not None and batchJob.running:
+            self.report(type={"ERROR"}, message="A batch is already running!")
+            return {"CANCELLED"}
+
+        filepath = bpy.path.abspath(context.scene.t2m_batch_file)
+        try:
+            rows = read_batch_file(filepath)
+        except (OSError, ValueError) as e:
+            self.report(type={"ERROR"}, message=f"Cannot read batch file: {e}")
+            return {"CANCELLED"}
+        if not any(row["prompt"] for row in rows):
+            self.report(type={"ERROR"}, message="Batch file has no prompts!")
+            return {"CANCELLED"}
+
+        # Resolved here, worker threads must not read the preferences
+        headers = HttpClient.auth_headers()
+        default_style = context.scene.t2m_art_style
+        default_name = context.scene.t2m_task_name
+
+        def submit(row):
+            payload = preview_payload(
+                row["prompt"],
+                row["art_style"] or default_style,
+                row["negative_prompt"],
+                row["name"] or default_name,
+                row["seed"],
+            )
+            return submit_text_to_model(payload, headers, HttpClient.BULK_POOL)
+
+        batchJob = BatchJob(rows, submit, context.scene.t2m_batch_concurrency)
+        batchJob.start()
+        redraw_while(lambda: watch_batch(batchJob, filepath))
+        self.report({"INFO"}, f"Submitting {len(rows)} tasks.")
         return {"FINISHED"}
 
 
+class CancelBatchSubmit(bpy.types.Operator):
+    bl_label = "Cancel Batch"
+    bl_idname = "meshy.t2m_cancel_batch"
+
+    def execute(self, context):
+        if batchJob is not None:
+            batchJob.cancel()
+        return {"FINISHED"}
+
+
+# Keeps the panel redrawing while a batch runs, writes the results at the end
+def watch_batch(job, filepath):
+    if job.running:
+        return True
+    try:
+        path = job.write_results(filepath)
+        print(f"Batch results written to {path}")
+    except OSError as e:
+        print(f"Failed to write batch results: {e}")
+    return False
+
+
 # Refresh task list
 class RefreshTaskList(bpy.types.Operator):
     bl_label = "Refresh Task List"
     bl_idname = "meshy.t2m_refresh_task_list"
 
-    def refreshOnePage(self, context):
-        headers = {"Authorization": f"Bearer {get_api_key()}"}
-        response = requests.get(T2M_URL + "?sortBy=-created_at", headers=headers)
-        # response = requests.get(T2M_URL, headers=headers)
-        response.raise_for_status()
-
-        if response.text != "[]":
-            global taskList
-            taskList = json.loads(response.text)
-            self.report(type={"INFO"}, message="Refreshing completed.")
-
     def execute(self, context):
-        self.refreshOnePage(context)
-        # print(taskList)
+        # Runs in the background, the panel shows the sync status
+        if not taskSync.start(HttpClient.auth_headers()):
+            self.report(type={"INFO"}, message="Refreshing already in progress.")
         return {"FINISHED"}
 
 
 # Download the model
-class DownloadModel(bpy.types.Operator):
+class DownloadModel(ModalDownloadOperator, bpy.types.Operator):
     bl_label = "Download Model"
     bl_idname = "t2m.download_model"
     downloadPath: bpy.props.StringProperty(name="download path", default="")
+    taskId: bpy.props.StringProperty(name="task id", default="")
+    thumbnailUrl: bpy.props.StringProperty(name="thumbnail url", default="")
+    progress_owner = "t2m"
 
-    def execute(self, context):
-        req = requests.get(self.downloadPath)
-        with tempfile.TemporaryDirectory() as tempDir:
-            fp = os.path.join(tempDir, "downloaded.glb")
-            with open(fp, "wb") as f:
-                f.write(req.content)
-            bpy.ops.import_scene.gltf(filepath=fp)
+    def download_source(self, context):
+        self.thumbnail_url = self.thumbnailUrl
+        return self.taskId, self.downloadPath, self.taskId or "Model"
+
+    def import_result(self, context, filepath):
+        import_glb(filepath)
         bpy.context.active_object.scale = (1, 1, 1)
         bpy.context.active_object.location = (0, 0, 0)
         bpy.ops.object.origin_set(type="ORIGIN_GEOMETRY")
         return {"FINISHED"}
 
+    def invoke(self, context, event):
+        if (
+            not context.scene.t2m_progressive_import
+            or self.use_library(context)
+            or get_model_cache().peek(self.taskId, self.downloadPath) is not None
+        ):
+            return super().invoke(context, event)
+
+        # Place a proxy right away, the full model replaces it when it is in
+        task = taskStore.get(self.taskId) or {}
+        previewPath = None
+        preview = taskStore.get(task.get("preview_task_id", ""))
+        if preview is not None and preview.get("model_urls", {}).get("glb"):
+            previewPath = get_model_cache().peek(
+                preview["id"], preview["model_urls"]["glb"]
+            )
+        proxy = place_proxy(context, task.get("name") or self.taskId, previewPath)
+        ProxySwap(
+            proxy,
+            self.taskId,
+            self.downloadPath,
+            thumbnail_url="" if previewPath else self.thumbnailUrl,
+            owner=self.progress_owner,
+        ).start()
+        return {"FINISHED"}
+
 
 # Refine the model
 class RefineModel(bpy.types.Operator):
@@ -90,19 +187,8 @@ class RefineModel(bpy.types.Operator):
     taskName: bpy.props.StringProperty(name="task name", default="")
 
     def execute(self, context):
-        payload = {
-            "mode": "refine",
-            "preview_task_id": self.modelId,
-            "name": self.taskName,
-        }
-        headers = {"Authorization": f"Bearer {get_api_key()}"}
-        response = requests.post(
-            T2M_URL,
-            headers=headers,
-            json=payload,
-        )
-        response.raise_for_status()
-        self.report({"INFO"}, response.text)
+        taskId = submit_text_to_model(refine_payload(self.modelId, self.taskName))
+        self.report({"INFO"}, f"Refine task {taskId} submitted.")
         return {"FINISHED"}
 
 
@@ -113,13 +199,9 @@ class DeleteTask(bpy.types.Operator):
     modelId: bpy.props.StringProperty(name="model id", default="")
 
     def execute(self, context):
-        headers = {"Authorization": f"Bearer {get_api_key()}"}
-        response = requests.delete(
-            T2M_URL + f"/{self.modelId}",
-            headers=headers,
-        )
-        response.raise_for_status()
-        self.report({"INFO"}, response.text)
+        delete_task(T2M_URL, self.modelId)
+        taskStore.remove(self.modelId)
+        self.report({"INFO"}, f"Task {self.modelId} deleted.")
         return {"FINISHED"}
 
 
@@ -132,6 +214,7 @@ class MeshyTextToModel(bpy.types.Panel):
     bl_options = {"DEFAULT_CLOSED"}
 
     # Draw the panel UI
+    @Tracing.traced("draw.text_to_model")
     def draw(self, context):
         layout = self.layout
         # Display a collapsible box for task generation settings
@@ -167,6 +250,27 @@ class MeshyTextToModel(bpy.types.Panel):
             row.scale_y = 1.5
             row.operator(SendSubmitRequest.bl_idname, text="Submit Task", icon="PLUS")
 
+            col.separator()
+            col.label(text="Batch Submit (CSV/JSON):")
+            col.prop(context.scene, "t2m_batch_file", text="")
+            col.prop(context.scene, "t2m_batch_concurrency")
+            row = col.row()
+            running = batchJob is not None and batchJob.running
+            row.enabled = not running
+            row.operator(
+                BatchSubmitRequest.bl_idname, text="Batch Submit", icon="DOCUMENTS"
+            )
+            if batchJob is not None:
+                col.label(text=batchJob.summary())
+                if running:
+                    col.operator(CancelBatchSubmit.bl_idname, icon="CANCEL")
+                failed = [row for row in batchJob.rows if row.status == "FAILED"]
+                for failedRow in failed[:5]:
+                    col.label(
+                        text=f"Row {failedRow.index + 1}: {failedRow.error}",
+                        icon="ERROR",
+                    )
+
         # Display a collapsible box for task list
         col = layout.box().column(align=True)
         row = col.row()
@@ -182,42 +286,60 @@ class MeshyTextToModel(bpy.types.Panel):
             col.operator(
                 RefreshTaskList.bl_idname, text="Refresh Task List", icon="FILE_REFRESH"
             )
+            draw_import_options(col, context.scene)
+            col.prop(context.scene, "t2m_progressive_import")
+            draw_downloads(col, "t2m")
+
+            if taskSync.status:
+                col.label(text=taskSync.status)
 
-            if len(taskList) == 0:
+            if len(taskStore) == 0:
                 return
 
-            for task in taskList:
+            scene = context.scene
+            draw_task_filters(col, scene, "t2m")
+            rows, page, pages, count = taskView.page(
+                scene.t2m_page,
+                scene.t2m_filter_status,
+                scene.t2m_filter_name,
+                scene.t2m_sort,
+            )
+            draw_pager(col, scene, "t2m", page, pages, count)
+
+            # Only the rows of the current page are drawn
+            for task in rows:
                 col.separator()
-                if task["status"] in ["SUCCEEDED", "FAILED", "PENDING", "IN_PROGRESS"]:
-                    row = col.row()
-                    row.label(text=task["name"])
-                    row.label(text=task["art_style"])
-                    row = col.row()
-                    row.label(text="Mode")
-                    row.label(text=task["mode"])
-                    row = col.row()
-                    row.label(text=f"Status {task['status']}")
-                    if task["status"] == "IN_PROGRESS":
-                        row.label(text=f"Progress {str(task['progress'])}")
+                row = col.row()
+                row.label(text=task.name)
+                row.label(text=task.art_style)
+                row = col.row()
+                row.label(text="Mode")
+                row.label(text=task.mode)
+                row = col.row()
+                row.label(text=task.status_text)
+                if task.progress_text:
+                    row.label(text=task.progress_text)
 
                 row = col.row()
-                if task["status"] == "SUCCEEDED":
+                if task.succeeded:
                     downloadButton = row.operator(
                         DownloadModel.bl_idname, text="Download", icon="SORT_ASC"
                     )
-                    downloadButton.downloadPath = task["model_urls"]["glb"]
+                    downloadButton.downloadPath = task.glb_url
+                    downloadButton.taskId = task.id
+                    downloadButton.thumbnailUrl = task.thumbnail_url
 
-                if task["status"] == "SUCCEEDED" and task["mode"] != "refine":
+                if task.succeeded and task.mode != "refine":
                     refineButton = row.operator(
                         RefineModel.bl_idname, text="Refine", icon="IMAGE"
                     )
-                    refineButton.modelId = task["id"]
-                    refineButton.taskName = task["name"]
+                    refineButton.modelId = task.id
+                    refineButton.taskName = task.name
 
                 deleteButton = row.operator(
                     DeleteTask.bl_idname, text="Delete", icon="TRASH"
                 )
-                deleteButton.modelId = task["id"]
+                deleteButton.modelId = task.id
 
 
 # Create value we will use in all of the windows
@@ -255,6 +377,50 @@ def CreateValue():
         description="Text to model task name",
         default="Meshy_model",
     )
+    bpy.types.Scene.t2m_batch_file = bpy.props.StringProperty(
+        name="Batch file",
+        description="CSV or JSON with prompt, negative_prompt, art_style, seed and name",
+        default="",
+        subtype="FILE_PATH",
+    )
+    bpy.types.Scene.t2m_batch_concurrency = bpy.props.IntProperty(
+        name="Concurrent submits",
+        description="How many batch tasks are submitted at the same time",
+        default=4,
+        min=1,
+        max=16,
+    )
+    bpy.types.Scene.t2m_progressive_import = bpy.props.BoolProperty(
+        name="Place Proxy First",
+        description=(
+            "Place a box or the preview mesh right away and swap in the full "
+            "model when its download finishes"
+        ),
+        default=True,
+    )
+    bpy.types.Scene.t2m_filter_status = bpy.props.EnumProperty(
+        name="Status",
+        items=STATUS_FILTERS,
+        description="Only list tasks with this status",
+        default="ALL",
+        update=reset_page("t2m"),
+    )
+    bpy.types.Scene.t2m_filter_name = bpy.props.StringProperty(
+        name="Filter",
+        description="Only list tasks whose name contains this",
+        default="",
+        update=reset_page("t2m"),
+    )
+    bpy.types.Scene.t2m_sort = bpy.props.EnumProperty(
+        name="Sort",
+        items=SORT_ORDERS,
+        description="Task list order",
+        default="NEWEST",
+        update=reset_page("t2m"),
+    )
+    bpy.types.Scene.t2m_page = bpy.props.IntProperty(
+        name="Page", description="Task list page", default=1, min=1
+    )
 
 
 # Delete the value we have created
@@ -265,11 +431,23 @@ def DeleteValue():
     del bpy.types.Scene.t2m_task_name
     del bpy.types.Scene.t2m_expanded_task_settings
     del bpy.types.Scene.t2m_expanded_task_list
+    del bpy.types.Scene.t2m_batch_file
+    del bpy.types.Scene.t2m_batch_concurrency
+    del bpy.types.Scene.t2m_progressive_import
+    del bpy.types.Scene.t2m_filter_status
+    del bpy.types.Scene.t2m_filter_name
+    del bpy.types.Scene.t2m_sort
+    del bpy.types.Scene.t2m_page
+
 
+# Keeps PENDING/IN_PROGRESS tasks of the list up to date
+poller = TaskPoller(T2M_URL, taskStore)
 
 classes = (
     MeshyTextToModel,
     SendSubmitRequest,
+    BatchSubmitRequest,
+    CancelBatchSubmit,
     RefreshTaskList,
     DownloadModel,
     RefineModel,
@@ -281,9 +459,11 @@ def register():
     for cls in classes:
         bpy.utils.register_class(cls)
     CreateValue()
+    poller.start()
 
 
 def unregister():
+    poller.stop()
     DeleteValue()
     for cls in reversed(classes):
         bpy.utils.unregister_class(cls)
@@ -1,12 +1,40 @@
-import json
 import bpy
+from bpy.app.handlers import persistent
 import tempfile
-from .Utils import get_api_key
-import requests
 import os
-
-T2T_URL = "https://api.meshy.ai/v1/text-to-texture"
-taskList = []
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from . import HttpClient
+from . import Tracing
+from .TaskPoller import TaskPoller
+from .TaskStore import TaskStore, TaskSync, fetch_task
+from .TaskView import (
+    SORT_ORDERS,
+    STATUS_FILTERS,
+    TaskView,
+    draw_pager,
+    draw_task_filters,
+    reset_page,
+)
+from .Dispatch import dispatcher, redraw_soon, redraw_while
+from .Download import draw_downloads, format_bytes, start_progress
+from .ExportProfile import EXPORT_PROFILES, export_selection
+from .ModalDownload import ModalDownloadOperator
+from .ImportPipeline import draw_import_options, import_glb, replace_object_data
+from .Upload import UploadCancelled, UploadUnconfirmed
+from .MeshyClient import T2T_URL, submit_text_to_texture
+
+taskStore = TaskStore()
+taskSync = TaskSync(T2T_URL, taskStore, on_done=redraw_soon)
+taskView = TaskView(taskStore)
+lastPayload = ""
+# Progress of the uploads started by Submit Task, cancelled all at once
+uploads = []
+# Custom property linking an object to the task texturing it
+SOURCE_TASK_PROP = "meshy_t2t_task_id"
+# Task id -> name of its source object, None until built from the objects
+sourceNames = None
 
 
 # Submit task
@@ -14,6 +42,7 @@ class SendSubmitRequest(bpy.types.Operator):
     bl_label = "Submit Task"
     bl_idname = "t2t.submit_task"
 
+    @Tracing.traced("t2t.submit")
     def execute(self, context):
         if len(bpy.context.selected_objects) == 0:
             self.report(type={"ERROR"}, message="No selected objects!")
@@ -33,74 +62,221 @@ class SendSubmitRequest(bpy.types.Operator):
             self.report(type={"ERROR"}, message="Style prompt cannot be empty!")
             return {"FINISHED"}
 
-        with tempfile.TemporaryDirectory() as tempDir:
+        postData = {
+            "object_prompt": context.scene.t2t_object_prompt,
+            "style_prompt": context.scene.t2t_style_prompt,
+            "enable_original_uv": context.scene.t2t_enable_original_UV,
+            "enable_pbr": context.scene.t2t_enable_PBR,
+            "negative_prompt": context.scene.t2t_negative_prompt,
+            "resolution": context.scene.t2t_resolution,
+            "art_style": context.scene.t2t_art_style,
+            "name": context.scene.t2t_task_name,
+        }
+
+        # Removed by upload_tasks once the last upload is done with it
+        tempDir = tempfile.mkdtemp()
+        if context.scene.t2t_per_object:
+            jobs = self.exportPerObject(context, postData, tempDir)
+        else:
             fp = os.path.join(tempDir, "exported.glb")
-            bpy.ops.export_scene.gltf(filepath=fp, use_selection=True)
-            postData = {
-                "object_prompt": context.scene.t2t_object_prompt,
-                "style_prompt": context.scene.t2t_style_prompt,
-                "enable_original_uv": context.scene.t2t_enable_original_UV,
-                "enable_pbr": context.scene.t2t_enable_PBR,
-                "negative_prompt": context.scene.t2t_negative_prompt,
-                "resolution": context.scene.t2t_resolution,
-                "art_style": context.scene.t2t_art_style,
-                "name": context.scene.t2t_task_name,
-            }
-            headers = {"Authorization": f"Bearer {get_api_key()}"}
-            response = requests.post(
-                T2T_URL,
-                files={
-                    "model_file": (
-                        context.scene.t2t_task_name + ".glb",
-                        open(fp, "rb"),
-                    )
-                },
-                headers=headers,
-                data=postData,
-            )
+            self.exportSelection(context, fp)
+            fileName = context.scene.t2t_task_name + ".glb"
+            jobs = [(postData, fileName, fp, "")]
+        if not jobs:
+            shutil.rmtree(tempDir, ignore_errors=True)
+            self.report(type={"ERROR"}, message="No selected mesh objects!")
+            return {"FINISHED"}
 
-        response.raise_for_status()
-        self.report({"INFO"}, response.text)
-        json_res = response.json()
-        print(json_res)
+        progresses = [start_progress(f"Upload {job[1]}", "t2t") for job in jobs]
+        uploads[:] = [p for p in uploads if not p.finished] + progresses
+        upload_tasks(
+            jobs,
+            progresses,
+            HttpClient.auth_headers(),
+            context.scene.t2t_upload_concurrency,
+            tempDir,
+        )
+        redraw_while(lambda: not all(p.finished for p in progresses))
+        self.report({"INFO"}, f"Uploading {len(jobs)} model(s)...")
         return {"FINISHED"}
 
+    def exportSelection(self, context, fp):
+        size = export_selection(
+            fp, context.scene.t2t_export_profile, context.scene.t2t_compress_mesh
+        )
+        global lastPayload
+        lastPayload = f"Payload {format_bytes(size)}"
+        if context.scene.t2t_compare_payload:
+            fullPath = fp[:-4] + ".full.glb"
+            fullSize = export_selection(fullPath, "FULL")
+            os.remove(fullPath)
+            saved = 100 * (1 - size / fullSize) if fullSize else 0
+            lastPayload += f" (full export {format_bytes(fullSize)}, -{saved:.0f}%)"
+        print(lastPayload)
+        return size
+
+    # One export and one task per selected mesh, linked to its source object
+    def exportPerObject(self, context, postData, tempDir):
+        selected = list(context.selected_objects)
+        objects = [obj for obj in selected if obj.type == "MESH"]
+        jobs = []
+        total = 0
+        try:
+            for i, obj in enumerate(objects):
+                for other in selected:
+                    other.select_set(other == obj)
+                fp = os.path.join(tempDir, f"exported_{i}.glb")
+                total += self.exportSelection(context, fp)
+                data = dict(postData, name=f"{postData['name']}_{obj.name}")
+                jobs.append((data, f"{obj.name}.glb", fp, obj.name))
+        finally:
+            for obj in selected:
+                obj.select_set(True)
+        global lastPayload
+        lastPayload = f"Payload {format_bytes(total)} in {len(jobs)} uploads"
+        return jobs
+
+
+# Upload exported models in the background, at most `concurrency` at a time,
+# and add the new tasks to the list. Returns right away, the pool's threads
+# end and tempDir is removed after the last upload.
+def upload_tasks(jobs, progresses, headers, concurrency, tempDir):
+    pool = ThreadPoolExecutor(
+        max_workers=max(1, concurrency), thread_name_prefix="meshy-upload"
+    )
+    remaining = [len(jobs)]
+    lock = threading.Lock()
+
+    def done(future):
+        with lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last:
+            shutil.rmtree(tempDir, ignore_errors=True)
+
+    for job, progress in zip(jobs, progresses):
+        pool.submit(upload_task, *job, headers, progress).add_done_callback(done)
+    pool.shutdown(wait=False)
+
+
+def upload_task(postData, fileName, fp, sourceName, headers, progress):
+    try:
+        taskId = submit_text_to_texture(postData, fileName, fp, headers, progress)
+        print(f"Submitted {fileName} as task {taskId}")
+        if sourceName:
+            dispatcher.call_soon(link_source, sourceName, taskId)
+        taskStore.merge([fetch_task(T2T_URL, taskId, headers)])
+        progress.finish()
+    except UploadCancelled:
+        progress.finish(error="cancelled")
+    except UploadUnconfirmed as e:
+        print(f"No answer to the upload of {fileName}, it may have been submitted: {e}")
+        progress.finish(error="no answer, check the task list")
+    except Exception as e:
+        print(f"Failed to submit {fileName}: {e}")
+        progress.finish(error="failed")
+
+
+# Remember on the object which task textures it, saved with the .blend
+def link_source(objectName, taskId):
+    obj = bpy.data.objects.get(objectName)
+    if obj is not None:
+        obj[SOURCE_TASK_PROP] = taskId
+        if sourceNames is not None:
+            sourceNames[taskId] = obj.name
+
+
+def rebuild_sources():
+    global sourceNames
+    sourceNames = {
+        obj[SOURCE_TASK_PROP]: obj.name
+        for obj in bpy.data.objects
+        if SOURCE_TASK_PROP in obj
+    }
+
+
+# Another file or an undo step may link other objects, rebuilt on next use
+@persistent
+def invalidate_sources(*args):
+    global sourceNames
+    sourceNames = None
+
+
+# The object a task textures, or None. Looks at all objects only when the
+# map is missing or an object was renamed or deleted since it was built.
+def source_object(taskId):
+    if sourceNames is None:
+        rebuild_sources()
+    name = sourceNames.get(taskId)
+    if name is None:
+        return None
+    obj = bpy.data.objects.get(name)
+    if obj is None or obj.get(SOURCE_TASK_PROP) != taskId:
+        rebuild_sources()
+        name = sourceNames.get(taskId)
+        obj = bpy.data.objects.get(name) if name else None
+    return obj
+
+
+SOURCE_HANDLERS = (
+    bpy.app.handlers.load_post,
+    bpy.app.handlers.undo_post,
+    bpy.app.handlers.redo_post,
+)
 
-# Refresh task list
-class RefreshTaskList(bpy.types.Operator):
-    bl_label = "Refresh Task List"
-    bl_idname = "t2t.refresh_task_list"
 
-    def refreshOnePage(self, context):
-        headers = {"Authorization": f"Bearer {get_api_key()}"}
+# Stop the uploads still running or queued, tasks already created stay
+class CancelUploads(bpy.types.Operator):
+    bl_label = "Cancel Uploads"
+    bl_idname = "t2t.cancel_uploads"
 
-        response = requests.get(T2T_URL + "?sortBy=-created_at", headers=headers)
+    def execute(self, context):
+        for progress in uploads:
+            if not progress.finished:
+                progress.cancel()
+        return {"FINISHED"}
 
-        response.raise_for_status()
 
-        if response.text != "[]":
-            global taskList
-            taskList = json.loads(response.text)
-            self.report(type={"INFO"}, message="Refreshing completed.")
+# Refresh task list
+class RefreshTaskList(bpy.types.Operator):
+    bl_label = "Refresh Task List"
+    bl_idname = "t2t.refresh_task_list"
 
     def execute(self, context):
-        self.refreshOnePage(context)
+        # Runs in the background, the panel shows the sync status
+        if not taskSync.start(HttpClient.auth_headers()):
+            self.report(type={"INFO"}, message="Refreshing already in progress.")
         return {"FINISHED"}
 
 
 # Download the model
-class DownloadModel(bpy.types.Operator):
+class DownloadModel(ModalDownloadOperator, bpy.types.Operator):
     bl_label = "Download Model"
     bl_idname = "t2t.download_model"
     downloadPath: bpy.props.StringProperty(name="download path", default="")
+    taskId: bpy.props.StringProperty(name="task id", default="")
+    thumbnailUrl: bpy.props.StringProperty(name="thumbnail url", default="")
+    progress_owner = "t2t"
+
+    def download_source(self, context):
+        self.thumbnail_url = self.thumbnailUrl
+        return self.taskId, self.downloadPath, self.taskId or "Model"
+
+    # Results linked to a source object replace its data instead
+    def use_library(self, context):
+        return super().use_library(context) and source_object(self.taskId) is None
+
+    def import_result(self, context, filepath):
+        # Tasks submitted per object texture their source object in place
+        source = source_object(self.taskId)
+        if source is not None:
+            if replace_object_data(source, import_glb(filepath)):
+                self.report({"INFO"}, f"Texture applied to {source.name}.")
+                return {"FINISHED"}
+            self.report({"WARNING"}, "Result has no mesh, imported as is.")
+            return {"FINISHED"}
 
-    def execute(self, context):
-        req = requests.get(self.downloadPath)
-        with tempfile.TemporaryDirectory() as tempDir:
-            fp = os.path.join(tempDir, "downloaded.glb")
-            with open(fp, "wb") as f:
-                f.write(req.content)
-            bpy.ops.import_scene.gltf(filepath=fp)
+        import_glb(filepath)
         bpy.context.active_object.scale = (1, 1, 1)
         bpy.context.active_object.location = (0, 0, 0)
         bpy.ops.object.origin_set(type="ORIGIN_GEOMETRY")
@@ -117,6 +293,7 @@ class MeshyTextToTexture(bpy.types.Panel):
     bl_options = {"DEFAULT_CLOSED"}
 
     # Draw the panel UI
+    @Tracing.traced("draw.text_to_texture")
     def draw(self, context):
         layout = self.layout
 
@@ -152,11 +329,25 @@ class MeshyTextToTexture(bpy.types.Panel):
             col.prop(context.scene, "t2t_resolution")
             col.prop(context.scene, "t2t_art_style")
             col.separator()
+            col.prop(context.scene, "t2t_export_profile")
+            row = col.row()
+            row.prop(context.scene, "t2t_compress_mesh")
+            row.prop(context.scene, "t2t_compare_payload")
+            row = col.row()
+            row.prop(context.scene, "t2t_per_object")
+            sub = row.row()
+            sub.enabled = context.scene.t2t_per_object
+            sub.prop(context.scene, "t2t_upload_concurrency", text="Jobs")
+            if lastPayload:
+                col.label(text=lastPayload, icon="EXPORT")
+            col.separator()
 
             # bigger button
             row = col.row()
             row.scale_y = 1.5
             row.operator(SendSubmitRequest.bl_idname, text="Submit Task", icon="PLUS")
+            if any(not p.finished for p in uploads):
+                col.operator(CancelUploads.bl_idname, icon="CANCEL")
 
         # Display a collapsible box for task list
         col = layout.box().column(align=True)
@@ -173,26 +364,49 @@ class MeshyTextToTexture(bpy.types.Panel):
             col.operator(
                 RefreshTaskList.bl_idname, text="Refresh Task List", icon="FILE_REFRESH"
             )
+            draw_import_options(col, context.scene)
+            draw_downloads(col, "t2t")
 
-            if len(taskList) == 0:
+            if taskSync.status:
+                col.label(text=taskSync.status)
+
+            if len(taskStore) == 0:
                 return
 
-            for task in taskList:
+            scene = context.scene
+            draw_task_filters(col, scene, "t2t")
+            rows, page, pages, count = taskView.page(
+                scene.t2t_page,
+                scene.t2t_filter_status,
+                scene.t2t_filter_name,
+                scene.t2t_sort,
+            )
+            draw_pager(col, scene, "t2t", page, pages, count)
+
+            # Only the rows of the current page are drawn
+            for task in rows:
                 col.separator()
-                if task["status"] in ["SUCCEEDED", "FAILED", "PENDING", "IN_PROGRESS"]:
-                    row = col.row()
-                    row.label(text=task["name"])
-                    row.label(text=task["art_style"])
-                    row = col.row()
-                    row.label(text=f"Status {task['status']}")
-                    if task["status"] == "IN_PROGRESS":
-                        row.label(text=f"Progress {str(task['progress'])}")
-
-                if task["status"] == "SUCCEEDED":
+                row = col.row()
+                row.label(text=task.name)
+                row.label(text=task.art_style)
+                row = col.row()
+                row.label(text=task.status_text)
+                if task.progress_text:
+                    row.label(text=task.progress_text)
+
+                source = source_object(task.id)
+                if source is not None:
+                    col.label(text=f"Source {source.name}", icon="OBJECT_DATA")
+
+                if task.succeeded:
                     downloadButton = col.operator(
-                        DownloadModel.bl_idname, text="Download", icon="SORT_ASC"
+                        DownloadModel.bl_idname,
+                        text="Download" if source is None else "Apply To Source",
+                        icon="SORT_ASC",
                     )
-                    downloadButton.downloadPath = task["model_urls"]["glb"]
+                    downloadButton.downloadPath = task.glb_url
+                    downloadButton.taskId = task.id
+                    downloadButton.thumbnailUrl = task.thumbnail_url
 
 
 # Create value we will use in all of the windows
@@ -250,6 +464,57 @@ def CreateValue():
         description="Text to texture task name",
         default="Meshy_model",
     )
+    bpy.types.Scene.t2t_export_profile = bpy.props.EnumProperty(
+        name="Upload",
+        items=EXPORT_PROFILES,
+        description="Data exported into the uploaded model",
+        default="MINIMAL",
+    )
+    bpy.types.Scene.t2t_compress_mesh = bpy.props.BoolProperty(
+        name="Compress Mesh",
+        description="Draco-compress the upload and quantize vertex attributes",
+        default=False,
+    )
+    bpy.types.Scene.t2t_per_object = bpy.props.BoolProperty(
+        name="Per Object",
+        description="Texture every selected object as its own task",
+        default=False,
+    )
+    bpy.types.Scene.t2t_upload_concurrency = bpy.props.IntProperty(
+        name="Concurrent Uploads",
+        description="How many per-object tasks are uploaded at the same time",
+        default=4,
+        min=1,
+        max=16,
+    )
+    bpy.types.Scene.t2t_compare_payload = bpy.props.BoolProperty(
+        name="Compare Size",
+        description="Also export the full selection to report the size saved",
+        default=False,
+    )
+    bpy.types.Scene.t2t_filter_status = bpy.props.EnumProperty(
+        name="Status",
+        items=STATUS_FILTERS,
+        description="Only list tasks with this status",
+        default="ALL",
+        update=reset_page("t2t"),
+    )
+    bpy.types.Scene.t2t_filter_name = bpy.props.StringProperty(
+        name="Filter",
+        description="Only list tasks whose name contains this",
+        default="",
+        update=reset_page("t2t"),
+    )
+    bpy.types.Scene.t2t_sort = bpy.props.EnumProperty(
+        name="Sort",
+        items=SORT_ORDERS,
+        description="Task list order",
+        default="NEWEST",
+        update=reset_page("t2t"),
+    )
+    bpy.types.Scene.t2t_page = bpy.props.IntProperty(
+        name="Page", description="Task list page", default=1, min=1
+    )
 
 
 # Delete the value we have created
@@ -262,13 +527,26 @@ def DeleteValue():
     del bpy.types.Scene.t2t_art_style
     del bpy.types.Scene.t2t_resolution
     del bpy.types.Scene.t2t_task_name
+    del bpy.types.Scene.t2t_export_profile
+    del bpy.types.Scene.t2t_compress_mesh
+    del bpy.types.Scene.t2t_compare_payload
+    del bpy.types.Scene.t2t_per_object
+    del bpy.types.Scene.t2t_upload_concurrency
     del bpy.types.Scene.t2t_expanded_task_settings
     del bpy.types.Scene.t2t_expanded_task_list
+    del bpy.types.Scene.t2t_filter_status
+    del bpy.types.Scene.t2t_filter_name
+    del bpy.types.Scene.t2t_sort
+    del bpy.types.Scene.t2t_page
+
 
+# Keeps PENDING/IN_PROGRESS tasks of the list up to date
+poller = TaskPoller(T2T_URL, taskStore)
 
 classes = (
     MeshyTextToTexture,
     SendSubmitRequest,
+    CancelUploads,
     RefreshTaskList,
     DownloadModel,
 )
@@ -278,9 +556,16 @@ def register():
     for cls in classes:
         bpy.utils.register_class(cls)
     CreateValue()
+    for handlers in SOURCE_HANDLERS:
+        handlers.append(invalidate_sources)
+    poller.start()
 
 
 def unregister():
+    poller.stop()
+    for handlers in SOURCE_HANDLERS:
+        if invalidate_sources in handlers:
+            handlers.remove(invalidate_sources)
     DeleteValue()
     for cls in reversed(classes):
         bpy.utils.unregister_class(cls)
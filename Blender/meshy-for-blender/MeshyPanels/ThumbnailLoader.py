@@ -0,0 +1,73 @@
+import itertools
+import queue
+import threading
+
+# Number of thumbnails downloaded at the same time
+THUMBNAIL_WORKERS = 4
+
+# Jobs of the visible page run first, anything else waits behind them
+PRIORITY_VISIBLE = 0
+PRIORITY_BACKGROUND = 1
+
+
+# Fixed-size pool working through a priority queue of thumbnail jobs.
+# Every page shown in the browser gets a new generation, queued jobs that
+# belong to a page which is no longer shown are dropped instead of run.
+class ThumbnailExecutor:
+    def __init__(self, workers=THUMBNAIL_WORKERS):
+        self.workers = workers
+        self._queue = queue.PriorityQueue()
+        self._order = itertools.count()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._threads = []
+        self.dropped = 0
+
+    @property
+    def generation(self):
+        return self._generation
+
+    # Start a new visible page, returns its generation
+    def new_generation(self):
+        with self._lock:
+            self._generation += 1
+            self._ensure_workers()
+            return self._generation
+
+    def submit(self, generation, job, priority=PRIORITY_VISIBLE):
+        self._queue.put((priority, next(self._order), generation, job))
+
+    # Jobs submitted with generation None (prefetching) are never stale
+    def is_current(self, generation):
+        return generation is None or generation == self._generation
+
+    def _ensure_workers(self):
+        self._threads = [t for t in self._threads if t.is_alive()]
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._work, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            _, _, generation, job = self._queue.get()
+            if job is None:
+                return
+            if not self.is_current(generation):
+                self.dropped += 1
+                continue
+            try:
+                job()
+            except Exception as e:
+                print(f"Thumbnail job failed: {e}")
+
+    def shutdown(self):
+        with self._lock:
+            # Invalidate anything still queued, then wake every worker up
+            self._generation += 1
+            for _ in self._threads:
+                self._queue.put((-1, next(self._order), None, None))
+            self._threads = []
+
+
+thumbnail_executor = ThumbnailExecutor()
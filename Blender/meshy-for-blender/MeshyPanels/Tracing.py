@@ -0,0 +1,200 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Completed spans kept for export, the oldest are dropped first
+MAX_SPANS = 5000
+# Upper bounds of the histogram buckets, in the unit of the observed value
+BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000)
+
+_lock = threading.Lock()
+_origin = time.perf_counter()
+_spans = deque(maxlen=MAX_SPANS)
+_counters = {}
+_histograms = {}
+enabled = True
+
+
+# Distribution of observed values in fixed buckets, plus exact count, sum,
+# minimum and maximum. Percentiles are read from the buckets.
+class Histogram:
+    def __init__(self, unit="ms"):
+        self.unit = unit
+        self.count = 0
+        self.total = 0.0
+        self.low = None
+        self.high = None
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def observe(self, value):
+        self.count += 1
+        self.total += value
+        self.low = value if self.low is None else min(self.low, value)
+        self.high = value if self.high is None else max(self.high, value)
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, fraction):
+        if not self.count:
+            return 0.0
+        wanted = fraction * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= wanted:
+                bound = BUCKETS[i] if i < len(BUCKETS) else self.high
+                return min(bound, self.high)
+        return self.high
+
+    def to_dict(self):
+        return {
+            "unit": self.unit,
+            "count": self.count,
+            "sum": self.total,
+            "min": self.low,
+            "max": self.high,
+            "mean": self.mean,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "buckets": dict(zip([*map(str, BUCKETS), "inf"], self.buckets)),
+        }
+
+
+def count(name, value=1):
+    if not enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def observe(name, value, unit="ms"):
+    if not enabled:
+        return
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = Histogram(unit)
+        histogram.observe(value)
+
+
+# Time a block: the duration goes into the histogram of the same name and the
+# span into the trace. args can be added to while the block runs.
+@contextmanager
+def span(name, **args):
+    if not enabled:
+        yield args
+        return
+    start = time.perf_counter()
+    try:
+        yield args
+    finally:
+        end = time.perf_counter()
+        duration = (end - start) * 1000
+        with _lock:
+            _spans.append(
+                (name, start - _origin, end - start, threading.get_ident(), args)
+            )
+            histogram = _histograms.get(name)
+            if histogram is None:
+                histogram = _histograms[name] = Histogram()
+            histogram.observe(duration)
+
+
+# Time a Panel.draw or Operator.execute/invoke. The wrapper keeps the
+# (self, context) signature, register_class checks the argument count.
+def traced(name):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, context):
+            with span(name):
+                return func(self, context)
+
+        return wrapper
+
+    return decorator
+
+
+def reset():
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+        _histograms.clear()
+
+
+def counters():
+    with _lock:
+        return dict(_counters)
+
+
+def histograms():
+    with _lock:
+        return {name: h.to_dict() for name, h in sorted(_histograms.items())}
+
+
+def span_count():
+    with _lock:
+        return len(_spans)
+
+
+def snapshot():
+    with _lock:
+        spans = [
+            {
+                "name": name,
+                "start_ms": start * 1000,
+                "duration_ms": duration * 1000,
+                "thread": thread,
+                "args": args,
+            }
+            for name, start, duration, thread, args in _spans
+        ]
+    return {"counters": counters(), "histograms": histograms(), "spans": spans}
+
+
+# The Chrome trace event format, opens in chrome://tracing and Perfetto
+def chrome_trace():
+    pid = os.getpid()
+    with _lock:
+        events = [
+            {
+                "name": name,
+                "cat": name.split(".")[0],
+                "ph": "X",
+                "ts": start * 1e6,
+                "dur": duration * 1e6,
+                "pid": pid,
+                "tid": thread,
+                "args": args,
+            }
+            for name, start, duration, thread, args in _spans
+        ]
+        now = (time.perf_counter() - _origin) * 1e6
+        for name, value in _counters.items():
+            events.append(
+                {
+                    "name": name,
+                    "ph": "C",
+                    "ts": now,
+                    "pid": pid,
+                    "args": {"value": value},
+                }
+            )
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def export(path, chrome=False):
+    data = chrome_trace() if chrome else snapshot()
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, default=str)
+    return path
@@ -0,0 +1,111 @@
+import bpy
+from bpy_extras.io_utils import ExportHelper
+from . import Tracing
+
+# Histograms listed in the panel, the export has all of them
+MAX_ROWS = 20
+
+
+class ExportTrace(bpy.types.Operator, ExportHelper):
+    bl_label = "Export Trace"
+    bl_idname = "meshy.export_trace"
+    bl_description = "Write the recorded spans, counters and histograms to a file"
+    filename_ext = ".json"
+    filter_glob: bpy.props.StringProperty(default="*.json", options={"HIDDEN"})
+    chrome: bpy.props.BoolProperty(
+        name="Chrome Trace",
+        description="Write the Chrome trace event format (chrome://tracing, Perfetto)",
+        default=False,
+    )
+
+    def execute(self, context):
+        try:
+            Tracing.export(self.filepath, chrome=self.chrome)
+        except OSError as e:
+            self.report({"ERROR"}, f"Cannot write trace: {e}")
+            return {"CANCELLED"}
+        self.report({"INFO"}, f"Trace written to {self.filepath}")
+        return {"FINISHED"}
+
+
+class ResetTrace(bpy.types.Operator):
+    bl_label = "Reset"
+    bl_idname = "meshy.reset_trace"
+    bl_description = "Forget everything recorded so far"
+
+    def execute(self, context):
+        Tracing.reset()
+        return {"FINISHED"}
+
+
+class MeshyTimings(bpy.types.Panel):
+    bl_idname = "MESHY_PT_timings"
+    bl_label = "Timings"
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+    bl_category = "Meshy"
+    bl_options = {"DEFAULT_CLOSED"}
+
+    def draw(self, context):
+        layout = self.layout
+        layout.prop(context.window_manager, "meshy_tracing")
+        row = layout.row()
+        row.operator(ExportTrace.bl_idname, text="JSON", icon="EXPORT").chrome = False
+        row.operator(
+            ExportTrace.bl_idname, text="Chrome Trace", icon="EXPORT"
+        ).chrome = True
+        row.operator(ResetTrace.bl_idname, icon="TRASH")
+
+        histograms = Tracing.histograms()
+        if histograms:
+            col = layout.box().column(align=True)
+            row = col.row()
+            row.label(text="Name")
+            row.label(text="Count")
+            row.label(text="Mean / p95 / Max")
+            for name, h in list(histograms.items())[:MAX_ROWS]:
+                row = col.row()
+                row.label(text=name)
+                row.label(text=str(h["count"]))
+                row.label(
+                    text=f"{h['mean']:.1f} / {h['p95']:.1f} / {h['max']:.1f} {h['unit']}"
+                )
+
+        counters = Tracing.counters()
+        if counters:
+            col = layout.box().column(align=True)
+            for name, value in sorted(counters.items())[:MAX_ROWS]:
+                row = col.row()
+                row.label(text=name)
+                row.label(text=str(value))
+        layout.label(text=f"{Tracing.span_count()} spans recorded")
+
+
+# Reads and writes Tracing.enabled itself, recording is one switch for the
+# whole session whichever file or scene is open
+def get_tracing(self):
+    return Tracing.enabled
+
+
+def set_tracing(self, value):
+    Tracing.enabled = value
+
+
+classes = (ExportTrace, ResetTrace, MeshyTimings)
+
+
+def register():
+    for cls in classes:
+        bpy.utils.register_class(cls)
+    bpy.types.WindowManager.meshy_tracing = bpy.props.BoolProperty(
+        name="Record Timings",
+        description="Time searches, downloads, imports, exports and panel drawing",
+        get=get_tracing,
+        set=set_tracing,
+    )
+
+
+def unregister():
+    del bpy.types.WindowManager.meshy_tracing
+    for cls in reversed(classes):
+        bpy.utils.unregister_class(cls)
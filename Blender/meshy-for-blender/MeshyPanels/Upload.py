@@ -0,0 +1,148 @@
+import os
+import time
+import uuid
+import requests
+from urllib3.exceptions import EmptyPoolError, NewConnectionError
+from . import HttpClient
+
+# Bytes read from disk per chunk of the request body
+UPLOAD_CHUNK = 256 * 1024
+UPLOAD_ATTEMPTS = 3
+RETRY_DELAY = 2.0
+
+
+class UploadCancelled(Exception):
+    pass
+
+
+# The request went out but no usable answer came back. The server may have
+# created the task anyway, sending it again could create a second paid one.
+class UploadUnconfirmed(Exception):
+    pass
+
+
+# Whether a request failed before any of it was sent: no connection was
+# free, or it could not be opened or timed out while connecting
+def failed_before_send(error):
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = error.args[0] if error.args else None
+    reason = getattr(reason, "reason", reason)
+    return isinstance(reason, (EmptyPoolError, NewConnectionError))
+
+
+# A name or file name quoted for a Content-Disposition parameter the way
+# browsers do it (RFC 7578, section 4.2): CR, LF and '"' percent-encoded
+def quote_param(value):
+    return str(value).translate({10: "%0A", 13: "%0D", 34: "%22"})
+
+
+# multipart/form-data body with one file part, read from disk chunk by chunk.
+# It has a length, so requests sends a Content-Length instead of chunked
+# encoding, and it can seek, so a failed attempt can be sent again.
+class MultipartFileStream:
+    def __init__(self, fields, file_field, file_name, filepath, progress=None):
+        self.boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+        self.filepath = filepath
+        self.progress = progress
+
+        head = b""
+        for name, value in fields.items():
+            head += (
+                f"--{self.boundary}\r\n"
+                f'Content-Disposition: form-data; name="{quote_param(name)}"\r\n\r\n'
+                f"{value}\r\n"
+            ).encode("utf-8")
+        head += (
+            f"--{self.boundary}\r\n"
+            f'Content-Disposition: form-data; name="{quote_param(file_field)}"; '
+            f'filename="{quote_param(file_name)}"\r\n'
+            "Content-Type: application/octet-stream\r\n\r\n"
+        ).encode("utf-8")
+        self._head = head
+        self._tail = f"\r\n--{self.boundary}--\r\n".encode("utf-8")
+        self._file_size = os.path.getsize(filepath)
+        self._length = len(self._head) + self._file_size + len(self._tail)
+        self._pos = 0
+        self._file = None
+
+    def __len__(self):
+        return self._length
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, pos, whence=os.SEEK_SET):
+        if whence == os.SEEK_END:
+            pos += self._length
+        elif whence == os.SEEK_CUR:
+            pos += self._pos
+        self._pos = max(0, min(pos, self._length))
+        if self.progress is not None:
+            self.progress.done = self._pos
+        return self._pos
+
+    def read(self, size=-1):
+        if self.progress is not None and self.progress.cancel_event.is_set():
+            raise UploadCancelled(self.filepath)
+        if size is None or size < 0:
+            size = self._length - self._pos
+        size = min(size, UPLOAD_CHUNK, self._length - self._pos)
+
+        chunk = b""
+        while len(chunk) < size:
+            chunk += self._read_at(self._pos + len(chunk), size - len(chunk))
+        self._pos += len(chunk)
+        if self.progress is not None:
+            self.progress.done = self._pos
+        return chunk
+
+    def _read_at(self, pos, size):
+        file_start = len(self._head)
+        file_end = file_start + self._file_size
+        if pos < file_start:
+            return self._head[pos : pos + size]
+        if pos < file_end:
+            if self._file is None:
+                self._file = open(self.filepath, "rb")
+            self._file.seek(pos - file_start)
+            return self._file.read(min(size, file_end - pos))
+        return self._tail[pos - file_end : pos - file_end + size]
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+# POST fields and one file as multipart/form-data, streamed from disk. The
+# service has no resumable uploads. Only connections that could not be
+# opened are tried again, from the start of the body; a failure after the
+# body went out raises UploadUnconfirmed.
+def upload_file(url, fields, file_field, file_name, filepath, headers, progress=None):
+    stream = MultipartFileStream(fields, file_field, file_name, filepath, progress)
+    if progress is not None:
+        progress.total = len(stream)
+    headers = {**headers, "Content-Type": stream.content_type}
+    try:
+        for attempt in range(1, UPLOAD_ATTEMPTS + 1):
+            stream.seek(0)
+            try:
+                response = HttpClient.post(
+                    url, data=stream, headers=headers, pool=HttpClient.BULK_POOL
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if not failed_before_send(e):
+                    raise UploadUnconfirmed(str(e)) from e
+                if attempt == UPLOAD_ATTEMPTS:
+                    raise
+                print(f"Upload attempt {attempt} failed: {e}")
+                time.sleep(RETRY_DELAY * attempt)
+                continue
+            if response.status_code >= 500:
+                raise UploadUnconfirmed(f"server error {response.status_code}")
+            response.raise_for_status()
+            return response
+    finally:
+        stream.close()
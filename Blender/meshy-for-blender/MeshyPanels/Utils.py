@@ -6,3 +6,14 @@ def get_api_key():
     user_preferences = bpy.context.preferences
     addon_preferences = user_preferences.addons["meshy-for-blender"].preferences
     return addon_preferences.api_key
+
+
+# Redraw the 3D view sidebars so panels pick up background results
+def redraw_panels():
+    wm = bpy.context.window_manager
+    if wm is None:
+        return
+    for window in wm.windows:
+        for area in window.screen.areas:
+            if area.type == "VIEW_3D":
+                area.tag_redraw()
@@ -2,6 +2,11 @@ import bpy
 from . import TextToTexturePanel
 from . import TextToModelPanel
 from . import AssetBrowser
+from . import HttpClient
+from .Dispatch import dispatcher
+from . import AssetLibrary
+from . import ImportPipeline
+from . import TracingPanel
 
 
 class APIKeySetting(bpy.types.AddonPreferences):
@@ -16,16 +21,32 @@ class APIKeySetting(bpy.types.AddonPreferences):
         layout = self.layout
         layout.prop(self, "api_key", full_event=True)
 
+        stats = HttpClient.pool_stats()
+        layout.label(
+            text=f"Connection pool: {stats['hits']} reused, "
+            f"{stats['misses']} opened, {stats['retries']} retries",
+            icon="LINKED",
+        )
+
 
 def register():
     bpy.utils.register_class(APIKeySetting)
+    dispatcher.start()
+    ImportPipeline.register()
+    AssetLibrary.register()
     AssetBrowser.register()
     TextToTexturePanel.register()
     TextToModelPanel.register()
+    TracingPanel.register()
 
 
 def unregister():
+    TracingPanel.unregister()
     TextToModelPanel.unregister()
     TextToTexturePanel.unregister()
     AssetBrowser.unregister()
+    AssetLibrary.unregister()
+    ImportPipeline.unregister()
     bpy.utils.unregister_class(APIKeySetting)
+    dispatcher.shutdown()
+    HttpClient.close()
@@ -0,0 +1,12 @@
+# Run Meshy for Blender without the UI:
+#   blender -b --python meshy_headless.py -- generate --prompt "a chair" --wait --import --save chair.blend
+#   blender -b --python meshy_headless.py -- --help
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from MeshyPanels import Headless  # noqa: E402
+
+argv = sys.argv[sys.argv.index("--") + 1 :] if "--" in sys.argv else []
+sys.exit(Headless.main(argv))